@@ -0,0 +1,104 @@
+"""Database connection profiles.
+
+A profile bundles the SQLAlchemy engine options and the SQLite pragmas
+applied to every new connection. ``tuned`` (the default) switches SQLite to
+WAL so readers are not blocked by writers, waits on locks instead of failing
+with "database is locked", and enlarges the page cache and memory map.
+``default`` leaves SQLite's stock settings, for comparison.
+
+Only SQLite is supported: the schema migrations track their version in
+``PRAGMA user_version`` and search uses an FTS5 table. In-memory databases
+(``sqlite://``) live on a single shared connection, so the profile's pool
+sizing is applied to file databases only.
+
+Environment:
+    DATABASE_URL      SQLAlchemy URL (default ``sqlite:///events.db``)
+    DATABASE_PROFILE  profile name (default ``tuned``)
+"""
+import os
+
+from sqlalchemy import event as sa_event
+from sqlalchemy.engine import make_url
+
+DEFAULT_DATABASE_URL = "sqlite:///events.db"
+
+# Engine options that only make sense for a QueuePool of file connections
+POOL_OPTIONS = ("pool_size", "max_overflow", "pool_timeout")
+
+DATABASE_PROFILES = {
+    "default": {
+        "pragmas": {},
+        "engine_options": {},
+    },
+    "tuned": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,  # ms
+            "mmap_size": 256 * 1024 * 1024,
+            "cache_size": -64 * 1024,  # negative = KiB, i.e. 64 MiB
+            "temp_store": "MEMORY",
+        },
+        "engine_options": {
+            "pool_size": 10,
+            "max_overflow": 20,
+            "pool_timeout": 30,
+            "pool_pre_ping": False,
+        },
+    },
+}
+
+
+def get_profile(name):
+    """Look up a profile by name, raising ValueError for unknown names"""
+    try:
+        return DATABASE_PROFILES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown database profile {name!r}; expected one of {sorted(DATABASE_PROFILES)}"
+        ) from None
+
+
+def configure_database(app):
+    """Fill the app's database config from the environment and profile"""
+    app.config.setdefault("SQLALCHEMY_DATABASE_URI", os.environ.get("DATABASE_URL", DEFAULT_DATABASE_URL))
+    app.config.setdefault("DATABASE_PROFILE", os.environ.get("DATABASE_PROFILE", "tuned"))
+    profile = get_profile(app.config["DATABASE_PROFILE"])
+
+    url = make_url(app.config["SQLALCHEMY_DATABASE_URI"])
+    if url.get_backend_name() != "sqlite":
+        raise ValueError(f"Unsupported database {url.get_backend_name()!r}; only SQLite URLs are supported")
+
+    options = dict(profile["engine_options"])
+    if is_memory_database(url):
+        for name in POOL_OPTIONS:
+            options.pop(name, None)
+    options.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+
+def is_memory_database(url):
+    """True for ``sqlite://``, ``sqlite:///:memory:`` and ``mode=memory`` URIs"""
+    database = url.database or ""
+    return database in ("", ":memory:") or url.query.get("mode") == "memory" or "mode=memory" in database
+
+
+def install_pragmas(engine, pragmas):
+    """Run ``PRAGMA name = value`` on every new SQLite connection of engine"""
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @sa_event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+
+def init_database(app, db):
+    """Bind db to app using the configured profile"""
+    configure_database(app)
+    db.init_app(app)
+    with app.app_context():
+        install_pragmas(db.engine, get_profile(app.config["DATABASE_PROFILE"])["pragmas"])
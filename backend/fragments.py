@@ -0,0 +1,179 @@
+"""Fragment cache for rendered event partials.
+
+Listings render the same card markup for every visitor, so templates call
+``cached_fragment("partials/<name>.html", event)`` for the event-specific
+part and keep per-user bits (registered buttons, etc.) inline. Entries are
+keyed by template and event id and carry the event's stamp
+(``updated_at`` plus ``registrations_version``) together with a hash of
+the partial's source and ``FRAGMENT_CACHE_VERSION``, so a deploy that
+changes the markup (or bumps the version, for changes in included
+templates or filters) doesn't serve old HTML from a persistent store. A
+stale stamp is a miss and the fragment is re-rendered.
+
+Partials are rendered without the request context processors, so they
+cannot reach ``current_user`` by accident.
+
+``FRAGMENT_CACHE_BACKEND`` picks the store: ``memory`` (per-process LRU),
+``sqlite`` (a local file at ``FRAGMENT_CACHE_PATH`` shared by every worker
+process on the host) or ``none``.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+from markupsafe import Markup
+from sqlalchemy import event as sa_event, update
+
+from backend.cache import TTLCache
+from models import Event, Society
+
+
+class NullFragmentBackend:
+    """Never stores anything"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, stamp, html):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryFragmentBackend:
+    """In-process LRU of (stamp, html) per key"""
+
+    def __init__(self, maxsize=5000, ttl=24 * 3600):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, stamp, html):
+        self._cache.set(key, (stamp, html))
+
+    def clear(self):
+        self._cache.clear()
+
+
+class SQLiteFragmentBackend:
+    """(stamp, html) per key in a SQLite file shared across worker processes"""
+
+    PRUNE_EVERY = 200
+
+    def __init__(self, path, maxsize=5000):
+        self.path = path
+        self.maxsize = maxsize
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS fragment "
+                "(key TEXT PRIMARY KEY, stamp TEXT NOT NULL, html TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")  # it's a cache
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        row = self._connect().execute("SELECT stamp, html FROM fragment WHERE key = ?", (key,)).fetchone()
+        return tuple(row) if row else None
+
+    def set(self, key, stamp, html):
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO fragment (key, stamp, html, stored_at) VALUES (?, ?, ?, ?)",
+                (key, stamp, html, time.time()),
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                connection.execute(
+                    "DELETE FROM fragment WHERE key NOT IN "
+                    "(SELECT key FROM fragment ORDER BY stored_at DESC LIMIT ?)",
+                    (self.maxsize,),
+                )
+
+    def clear(self):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM fragment")
+
+
+def event_stamp(event):
+    """Version of everything an event card shows"""
+    updated_at = event.updated_at.isoformat() if event.updated_at else ""
+    return f"{updated_at}|{event.registrations_version or 0}"
+
+
+class FragmentCache:
+    """Renders partials through a backend, counting hits and misses"""
+
+    def __init__(self, backend, version=""):
+        self.backend = backend
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._template_versions = {}
+
+    def template_version(self, template_name):
+        """Short hash of the partial's source plus the configured cache version"""
+        version = self._template_versions.get(template_name)
+        if version is None:
+            env = current_app.jinja_env
+            source = env.loader.get_source(env, template_name)[0]
+            digest = hashlib.sha1(f"{self.version}\0{source}".encode()).hexdigest()[:12]
+            version = self._template_versions[template_name] = digest
+        return version
+
+    def render(self, template_name, event):
+        key = f"{template_name}:{event.id}"
+        stamp = f"{self.template_version(template_name)}|{event_stamp(event)}"
+        cached = self.backend.get(key)
+        if cached is not None and cached[0] == stamp:
+            self.hits += 1
+            return Markup(cached[1])
+        self.misses += 1
+        html = current_app.jinja_env.get_template(template_name).render(event=event)
+        self.backend.set(key, stamp, html)
+        return Markup(html)
+
+
+def make_backend(app):
+    name = app.config.get("FRAGMENT_CACHE_BACKEND", "memory")
+    size = app.config.get("FRAGMENT_CACHE_SIZE", 5000)
+    if name == "sqlite":
+        return SQLiteFragmentBackend(app.config["FRAGMENT_CACHE_PATH"], maxsize=size)
+    if name == "memory":
+        return MemoryFragmentBackend(maxsize=size)
+    return NullFragmentBackend()
+
+
+def init_fragment_cache(app):
+    """Create the app's FragmentCache and expose ``cached_fragment`` to templates"""
+    cache = FragmentCache(make_backend(app), version=str(app.config.get("FRAGMENT_CACHE_VERSION", "")))
+    app.extensions["fragment_cache"] = cache
+    app.jinja_env.globals["cached_fragment"] = lambda template_name, event: (
+        current_app.extensions["fragment_cache"].render(template_name, event)
+    )
+    return cache
+
+
+@sa_event.listens_for(Society, "after_update")
+def _touch_society_events(mapper, connection, target):
+    """Cards show the society name, so a rename restamps its events"""
+    connection.execute(
+        update(Event.__table__)
+        .where(Event.__table__.c.society_id == target.id)
+        .values(updated_at=datetime.utcnow())
+    )
@@ -0,0 +1,131 @@
+"""Password hashing on a bounded worker process pool.
+
+scrypt/pbkdf2 are deliberately slow. Running them in request threads lets a
+burst of logins starve every other page, so hashing and verification are
+sent to a small pool of worker processes instead. At most
+``PASSWORD_HASH_MAX_PENDING`` operations may be queued or running; callers
+beyond that wait up to ``PASSWORD_HASH_QUEUE_TIMEOUT`` seconds for a slot
+and then get ``HashingBusyError`` (served as 503).
+
+``PASSWORD_HASH_WORKERS = 0`` hashes inline in the calling thread.
+"""
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Passwords per pool task in hash_many
+BATCH_CHUNK_SIZE = 8
+
+
+def _hash_chunk(passwords, method):
+    return [generate_password_hash(password, method) for password in passwords]
+
+
+class HashingBusyError(Exception):
+    """Raised when the hashing queue stays full for too long"""
+
+
+class PasswordHasher:
+    """Runs werkzeug hash/verify calls on a lazily started process pool"""
+
+    def __init__(self, workers=1, max_pending=64, queue_timeout=10.0):
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: never fork a process that holds DB connections and threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def _submit(self, func, *args):
+        """Queue func on the pool holding one slot until it finishes; None if the pool broke"""
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise HashingBusyError("Password hashing queue is full")
+        try:
+            future = self._get_pool().submit(func, *args)
+        except BrokenProcessPool:
+            self._slots.release()
+            self._reset_pool()
+            return None
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _result(self, future, func, *args):
+        if future is not None:
+            try:
+                return future.result()
+            except BrokenProcessPool:
+                self._reset_pool()
+        # A worker died; start a fresh pool next time and finish this call inline
+        return func(*args)
+
+    def _reset_pool(self):
+        with self._pool_lock:
+            self._pool = None
+
+    def _run(self, func, *args):
+        if self.workers == 0:
+            return func(*args)
+        return self._result(self._submit(func, *args), func, *args)
+
+    def hash(self, password, method):
+        """Return a werkzeug hash of password using method"""
+        return self._run(generate_password_hash, password, method)
+
+    def hash_many(self, passwords, method):
+        """Hash a batch of passwords in small chunks that queue like single calls
+
+        Each chunk takes its own queue slot, and at most ``workers - 1`` chunks
+        are in flight, so a login arriving mid-batch waits for one chunk
+        rather than the whole batch.
+        """
+        passwords = list(passwords)
+        if self.workers == 0 or not passwords:
+            return _hash_chunk(passwords, method)
+        in_flight = max(1, self.workers - 1)
+        pending = deque()
+        hashes = []
+        for start in range(0, len(passwords), BATCH_CHUNK_SIZE):
+            if len(pending) >= in_flight:
+                hashes.extend(self._result(*pending.popleft()))
+            chunk = passwords[start:start + BATCH_CHUNK_SIZE]
+            pending.append((self._submit(_hash_chunk, chunk, method), _hash_chunk, chunk, method))
+        while pending:
+            hashes.extend(self._result(*pending.popleft()))
+        return hashes
+
+    def verify(self, pwhash, password):
+        """Return True if password matches pwhash"""
+        return self._run(check_password_hash, pwhash, password)
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+
+def init_password_hasher(app):
+    """Create the app's hasher from PASSWORD_HASH_WORKERS / _MAX_PENDING / _QUEUE_TIMEOUT"""
+    hasher = PasswordHasher(
+        workers=app.config.get("PASSWORD_HASH_WORKERS", max(1, (os.cpu_count() or 2) - 1)),
+        max_pending=app.config.get("PASSWORD_HASH_MAX_PENDING", 64),
+        queue_timeout=app.config.get("PASSWORD_HASH_QUEUE_TIMEOUT", 10.0),
+    )
+    app.extensions["password_hasher"] = hasher
+    return hasher
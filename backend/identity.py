@@ -0,0 +1,103 @@
+"""Session identity cache for Flask-Login.
+
+``load_user`` runs on every authenticated request, but almost every route
+only needs the user's id and role. Instead of an ORM ``User`` it returns a
+compact, immutable ``UserIdentity`` snapshot held in a process-local
+TTL + LRU cache. The ORM object is loaded lazily, at most once per request,
+the first time a caller touches anything beyond the snapshot fields.
+
+Entries are dropped once a session in this process commits an update or
+delete of the User row (not at flush time, when another request could
+still re-cache the old row); other worker processes see the change within
+``IDENTITY_CACHE_TTL`` seconds.
+"""
+from flask import current_app, g
+from flask_login import UserMixin
+from sqlalchemy import event as sa_event, select
+from sqlalchemy.orm import Session
+
+from backend.cache import TTLCache
+from models import db, User
+
+_identities = TTLCache(maxsize=10000, ttl=60)
+
+CHANGED_USERS_KEY = "changed_user_ids"
+
+
+class UserIdentity(UserMixin):
+    """Read-only snapshot of the fields the decorators and templates use"""
+
+    __slots__ = ("id", "name", "email", "role")
+
+    def __init__(self, id, name, email, role):
+        object.__setattr__(self, "id", id)
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "email", email)
+        object.__setattr__(self, "role", role)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("UserIdentity is immutable; load the User to modify it")
+
+    @property
+    def user(self):
+        """The full ORM User, loaded on first use within the request"""
+        loaded = g.setdefault("identity_users", {})
+        if self.id not in loaded:
+            loaded[self.id] = db.session.get(User, self.id)
+        return loaded[self.id]
+
+    def __getattr__(self, name):
+        # Anything beyond the snapshot (relationships, created_at, ...)
+        return getattr(self.user, name)
+
+    def __repr__(self):
+        return f"<UserIdentity {self.email} - {self.role}>"
+
+
+def configure_identity_cache(app):
+    """Size the cache from IDENTITY_CACHE_SIZE / IDENTITY_CACHE_TTL"""
+    _identities.maxsize = app.config.get("IDENTITY_CACHE_SIZE", 10000)
+    _identities.ttl = app.config.get("IDENTITY_CACHE_TTL", 60)
+    _identities.clear()
+
+
+def load_identity(user_id):
+    """Return the cached identity for user_id, querying only on a miss"""
+    user_id = int(user_id)
+    identity = _identities.get(user_id)
+    if identity is not None:
+        return identity
+
+    row = db.session.execute(
+        select(User.id, User.name, User.email, User.role).where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    identity = UserIdentity(*row)
+    if current_app.config.get("IDENTITY_CACHE_TTL", 60) > 0:
+        _identities.set(user_id, identity)
+    return identity
+
+
+def invalidate_identity(user_id):
+    """Forget the cached identity for user_id"""
+    _identities.pop(int(user_id))
+
+
+@sa_event.listens_for(User, "after_update")
+@sa_event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(CHANGED_USERS_KEY, set()).add(target.id)
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _evict_changed_users(session):
+    for user_id in session.info.pop(CHANGED_USERS_KEY, ()):
+        invalidate_identity(user_id)
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session):
+    session.info.pop(CHANGED_USERS_KEY, None)
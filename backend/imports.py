@@ -0,0 +1,309 @@
+"""Bulk student and registration imports.
+
+Term enrollment loads tens of thousands of students at once, so rows are
+validated up front, checked for email / student number clashes with one
+set-based query per chunk, hashed in parallel on the password worker pool
+and inserted in batched transactions. Class lists are registered for an
+event the same way: existence, duplicates and capacity are decided for the
+whole list in one transaction. Problems are reported per row rather than
+aborting the whole file.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from flask import current_app, has_app_context
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
+
+from backend.live import note_seat_change
+from backend.stats import invalidate_dashboard_stats
+from models import db, Event, Registration, User, password_hash_method
+
+STUDENT_FIELDS = ("student_number", "name", "email", "password")
+IMPORT_BATCH_SIZE = 1000
+LOOKUP_CHUNK = 500
+
+
+class StudentImportError(ValueError):
+    """Raised when an import file can't be read at all"""
+
+
+class ImportReport:
+    """Outcome of an import: rows read, rows created and per-row errors"""
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.errors = []
+
+    def reject(self, line, message):
+        self.errors.append((line, message))
+
+    def __repr__(self):
+        return f"<ImportReport rows={self.rows} created={self.created} errors={len(self.errors)}>"
+
+
+class RegistrationReport(ImportReport):
+    """ImportReport that also lists the accepted student numbers"""
+
+    def __init__(self):
+        super().__init__()
+        self.accepted = []
+
+
+def parse_student_file(stream, filename):
+    """Read (line, row dict) pairs from an uploaded CSV or JSON file
+
+    CSV needs a header naming the STUDENT_FIELDS columns. JSON may be a list
+    of objects or ``{"students": [...]}``.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig")
+    if filename.lower().endswith(".json"):
+        try:
+            data = json.load(text)
+        except ValueError as e:
+            raise StudentImportError(f"Invalid JSON: {e}")
+        if isinstance(data, dict):
+            data = data.get("students")
+        if not isinstance(data, list):
+            raise StudentImportError("JSON must be a list of students")
+        return [(index, row if isinstance(row, dict) else {}) for index, row in enumerate(data, start=1)]
+
+    try:
+        reader = csv.DictReader(text)
+        missing = [field for field in STUDENT_FIELDS if field not in (reader.fieldnames or [])]
+        if missing:
+            raise StudentImportError(f"CSV header is missing: {', '.join(missing)}")
+        # Header is line 1
+        return [(index, row) for index, row in enumerate(reader, start=2)]
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise StudentImportError(f"File must be UTF-8 CSV: {e}")
+
+
+def _clean(raw):
+    return {field: str(raw.get(field) or "").strip() for field in STUDENT_FIELDS}
+
+
+def _taken(records):
+    """Emails and student numbers among records that already exist, chunked IN lookups"""
+    emails, numbers = set(), set()
+    for start in range(0, len(records), LOOKUP_CHUNK):
+        chunk = records[start:start + LOOKUP_CHUNK]
+        rows = db.session.execute(
+            select(User.email, User.student_number).where(or_(
+                User.email.in_([record["email"] for record in chunk]),
+                User.student_number.in_([record["student_number"] for record in chunk]),
+            ))
+        )
+        for email, number in rows:
+            emails.add(email)
+            numbers.add(number)
+    return emails, numbers
+
+
+def _hash_passwords(passwords, method):
+    hasher = current_app.extensions.get("password_hasher") if has_app_context() else None
+    if hasher:
+        return hasher.hash_many(passwords, method)
+    return [generate_password_hash(password, method) for password in passwords]
+
+
+def _insert_batch(batch, report):
+    """Insert (line, values) pairs in one transaction, falling back to per-row savepoints"""
+    try:
+        db.session.execute(insert(User), [values for _, values in batch])
+        db.session.commit()
+        report.created += len(batch)
+        return
+    except IntegrityError:
+        db.session.rollback()
+
+    # Someone else created a clashing user since the lookup; find which rows
+    for line, values in batch:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(User), [values])
+            report.created += 1
+        except IntegrityError:
+            report.reject(line, "Email or student ID already exists")
+    db.session.commit()
+
+
+def import_students(rows, batch_size=IMPORT_BATCH_SIZE):
+    """Create student accounts from (line, row dict) pairs and return an ImportReport"""
+    report = ImportReport()
+    records = []
+    seen_emails, seen_numbers = set(), set()
+
+    for line, raw in rows:
+        report.rows += 1
+        record = _clean(raw)
+        missing = [field for field in STUDENT_FIELDS if not record[field]]
+        if missing:
+            report.reject(line, f"Missing {', '.join(missing)}")
+        elif "@" not in record["email"]:
+            report.reject(line, "Invalid email address")
+        elif record["email"] in seen_emails:
+            report.reject(line, "Duplicate email in file")
+        elif record["student_number"] in seen_numbers:
+            report.reject(line, "Duplicate student ID in file")
+        else:
+            seen_emails.add(record["email"])
+            seen_numbers.add(record["student_number"])
+            record["line"] = line
+            records.append(record)
+
+    taken_emails, taken_numbers = _taken(records)
+    accepted = []
+    for record in records:
+        if record["email"] in taken_emails:
+            report.reject(record["line"], "Email already exists")
+        elif record["student_number"] in taken_numbers:
+            report.reject(record["line"], "Student ID already exists")
+        else:
+            accepted.append(record)
+
+    method = password_hash_method()
+    for start in range(0, len(accepted), batch_size):
+        chunk = accepted[start:start + batch_size]
+        hashes = _hash_passwords([record["password"] for record in chunk], method)
+        batch = [
+            (record["line"], {
+                "student_number": record["student_number"],
+                "name": record["name"],
+                "email": record["email"],
+                "password_hash": password_hash,
+                "role": "student",
+            })
+            for record, password_hash in zip(chunk, hashes)
+        ]
+        _insert_batch(batch, report)
+
+    report.errors.sort()
+    if report.created:
+        # Core inserts bypass the flush that normally flags this
+        invalidate_dashboard_stats()
+    return report
+
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), LOOKUP_CHUNK):
+        yield values[start:start + LOOKUP_CHUNK]
+
+
+def _bump_event(event_id, delta=0):
+    event_table = Event.__table__
+    db.session.execute(
+        update(event_table)
+        .where(event_table.c.id == event_id)
+        .values(
+            registered_count=event_table.c.registered_count + delta,
+            registrations_version=event_table.c.registrations_version + 1,
+        )
+    )
+    if delta:
+        note_seat_change(db.session, event_id)
+
+
+def bulk_register(event_id, student_numbers, source_event_id=None, move=False):
+    """Register a list of student numbers for an event in one transaction
+
+    With source_event_id only students registered for that event are
+    accepted and their contact/payment details are copied over; move=True
+    also removes them from the source event. Returns a RegistrationReport.
+    """
+    report = RegistrationReport()
+    wanted, seen = [], set()
+    for number in student_numbers:
+        number = number.strip()
+        if not number:
+            continue
+        report.rows += 1
+        if number in seen:
+            report.reject(number, "Listed more than once")
+            continue
+        seen.add(number)
+        wanted.append(number)
+
+    registration_table = Registration.__table__
+    event_table = Event.__table__
+    try:
+        # Write first so the event row is locked before capacity is read
+        _bump_event(event_id)
+        capacity, registered = db.session.execute(
+            select(event_table.c.capacity, event_table.c.registered_count)
+            .where(event_table.c.id == event_id)
+        ).one()
+
+        students = {}
+        for chunk in _chunks(wanted):
+            students.update(db.session.execute(
+                select(User.student_number, User.id)
+                .where(User.role == "student", User.student_number.in_(chunk))
+            ).all())
+
+        already, source = set(), {}
+        for chunk in _chunks(students.values()):
+            already.update(db.session.scalars(
+                select(registration_table.c.student_id)
+                .where(registration_table.c.event_id == event_id,
+                       registration_table.c.student_id.in_(chunk))
+            ))
+            if source_event_id is not None:
+                for student_id, *details in db.session.execute(
+                    select(registration_table.c.student_id, registration_table.c.phone_number,
+                           registration_table.c.payment_method, registration_table.c.invoice_path)
+                    .where(registration_table.c.event_id == source_event_id,
+                           registration_table.c.student_id.in_(chunk))
+                ):
+                    source[student_id] = details
+
+        now = datetime.utcnow()
+        rows = []
+        for number in wanted:
+            student_id = students.get(number)
+            if student_id is None:
+                report.reject(number, "Unknown student ID")
+            elif student_id in already:
+                report.reject(number, "Already registered")
+            elif source_event_id is not None and student_id not in source:
+                report.reject(number, "Not registered for the source event")
+            elif registered + len(rows) >= capacity:
+                report.reject(number, "Event is full")
+            else:
+                phone, payment, invoice = source.get(student_id, (None, None, None))
+                rows.append({"event_id": event_id, "student_id": student_id, "registration_date": now,
+                             "phone_number": phone, "payment_method": payment, "invoice_path": invoice})
+                report.accepted.append(number)
+
+        if rows:
+            # Core insert: seats are claimed once for the batch below, not per row
+            db.session.execute(insert(registration_table), rows)
+            _bump_event(event_id, len(rows))
+            if move and source_event_id is not None:
+                moved = 0
+                for chunk in _chunks(row["student_id"] for row in rows):
+                    moved += db.session.execute(
+                        delete(registration_table)
+                        .where(registration_table.c.event_id == source_event_id,
+                               registration_table.c.student_id.in_(chunk))
+                    ).rowcount
+                _bump_event(source_event_id, -moved)
+        db.session.commit()
+    except IntegrityError:
+        # A student registered themselves between the lookup and the insert
+        db.session.rollback()
+        for number in report.accepted:
+            report.reject(number, "Registration changed while importing, try again")
+        report.accepted = []
+        rows = []
+
+    report.created = len(report.accepted)
+    report.errors.sort()
+    if rows:
+        invalidate_dashboard_stats()
+    return report
@@ -0,0 +1,151 @@
+"""Opt-in per-request SQL instrumentation.
+
+When enabled, SQLAlchemy cursor events record each request's query count,
+total database time and slowest statements. The totals are sent back in a
+``Server-Timing`` header, and statements slower than
+``SLOW_QUERY_THRESHOLD_MS`` are written to a rotating slow-query log with
+the endpoint that issued them. A request whose statements add up to more
+than the threshold gets one summary line there too, listing its slowest
+statements, which catches N+1 patterns made of individually fast queries.
+
+When disabled no engine listeners are installed, so queries pay nothing
+and each request pays one flag check.
+"""
+import heapq
+import logging
+import os
+import time
+from logging.handlers import RotatingFileHandler
+
+from flask import g, has_request_context, request
+from sqlalchemy import event as sa_event
+
+from models import db
+
+slow_query_logger = logging.getLogger("dbs.slow_queries")
+
+
+class RequestSqlStats:
+    """Query statistics for a single request"""
+
+    __slots__ = ("count", "total", "slowest", "top_n")
+
+    def __init__(self, top_n):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = []  # min-heap of (seconds, statement)
+        self.top_n = top_n
+
+    def record(self, seconds, statement):
+        self.count += 1
+        self.total += seconds
+        if len(self.slowest) < self.top_n:
+            heapq.heappush(self.slowest, (seconds, statement))
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (seconds, statement))
+
+    def slowest_first(self):
+        return sorted(self.slowest, reverse=True)
+
+
+class SqlInstrumentation:
+    """Installs and removes the engine listeners for one Flask app"""
+
+    def __init__(self, app):
+        self.app = app
+        self.enabled = False
+        self._engine = None
+        self._handler = None
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def enable(self):
+        """Start recording queries; safe to call more than once"""
+        if self.enabled:
+            return
+        config = self.app.config
+        self.threshold = config.get("SLOW_QUERY_THRESHOLD_MS", 100) / 1000.0
+        self.top_n = config.get("SQL_INSTRUMENTATION_TOP_N", 3)
+
+        log_path = config.get("SLOW_QUERY_LOG") or os.path.join(self.app.instance_path, "slow_queries.log")
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        self._handler = RotatingFileHandler(
+            log_path,
+            maxBytes=config.get("SLOW_QUERY_LOG_MAX_BYTES", 5 * 1024 * 1024),
+            backupCount=config.get("SLOW_QUERY_LOG_BACKUPS", 3),
+        )
+        self._handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        slow_query_logger.addHandler(self._handler)
+        slow_query_logger.setLevel(logging.INFO)
+
+        with self.app.app_context():
+            self._engine = db.engine
+        sa_event.listen(self._engine, "before_cursor_execute", self._before_cursor_execute)
+        sa_event.listen(self._engine, "after_cursor_execute", self._after_cursor_execute)
+        sa_event.listen(self._engine, "handle_error", self._handle_error)
+        self.enabled = True
+
+    def disable(self):
+        """Stop recording and close the slow-query log"""
+        if not self.enabled:
+            return
+        sa_event.remove(self._engine, "before_cursor_execute", self._before_cursor_execute)
+        sa_event.remove(self._engine, "after_cursor_execute", self._after_cursor_execute)
+        sa_event.remove(self._engine, "handle_error", self._handle_error)
+        slow_query_logger.removeHandler(self._handler)
+        self._handler.close()
+        self._handler = None
+        self.enabled = False
+
+    def _before_request(self):
+        if self.enabled:
+            g.sql_stats = RequestSqlStats(self.top_n)
+
+    def _after_request(self, response):
+        stats = g.get("sql_stats") if self.enabled else None
+        if stats is not None:
+            response.headers.add(
+                "Server-Timing",
+                f'db;dur={stats.total * 1000:.2f};desc="{stats.count} queries"',
+            )
+            if stats.total >= self.threshold:
+                slowest = "; ".join(
+                    f"{seconds * 1000:.1f}ms {' '.join(statement.split())}"
+                    for seconds, statement in stats.slowest_first()
+                )
+                slow_query_logger.info(
+                    "request %.1fms %d queries endpoint=%s slowest: %s",
+                    stats.total * 1000, stats.count, request.endpoint or "-", slowest,
+                )
+        return response
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        endpoint = None
+        if has_request_context():
+            endpoint = request.endpoint
+            stats = g.get("sql_stats")
+            if stats is not None:
+                stats.record(elapsed, statement)
+        if elapsed >= self.threshold:
+            slow_query_logger.info(
+                "%.1fms endpoint=%s %s", elapsed * 1000, endpoint or "-", " ".join(statement.split())
+            )
+
+    def _handle_error(self, context):
+        # after_cursor_execute never runs for a failed statement; drop its start time
+        conn = context.connection
+        if conn is not None and context.execution_context is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+
+def init_instrumentation(app):
+    """Attach instrumentation to app, enabled if SQL_INSTRUMENTATION is set"""
+    instrumentation = SqlInstrumentation(app)
+    app.extensions["sql_instrumentation"] = instrumentation
+    if app.config.get("SQL_INSTRUMENTATION"):
+        instrumentation.enable()
+    return instrumentation
@@ -0,0 +1,323 @@
+"""Content-addressed invoice storage.
+
+Uploads are hashed while they stream to a temporary file and then moved to
+``invoices/<aa>/<bb>/<sha256><ext>`` under the static folder, so identical
+files are stored once no matter how many registrations point at them.
+``Registration.invoice_path`` holds ``static/invoices/<aa>/<bb>/<digest><ext>``;
+blobs nothing refers to any more are removed by ``collect_garbage``.
+
+Image blobs are post-processed in the background (``process_invoice``):
+a size-capped re-encode ``<digest>.full.<fmt>`` and a small
+``<digest>.thumb.<fmt>`` for listings are written next to the original,
+which is then dropped unless ``INVOICE_KEEP_ORIGINALS`` is set. Derived
+files share the original's digest, so they are deduplicated and collected
+along with it.
+
+``send_invoice`` serves files with a strong content ETag, conditional GET
+and byte ranges, private Cache-Control, and optionally hands the bytes to
+the front web server via X-Sendfile or X-Accel-Redirect.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from urllib.parse import quote
+
+from flask import current_app, request
+from sqlalchemy import select, update
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+from werkzeug.utils import send_file
+
+from backend.cache import TTLCache
+from models import db, Registration
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; images are then served as uploaded
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+INVOICE_EXTENSIONS = {".pdf": ".pdf", ".png": ".png", ".jpg": ".jpg", ".jpeg": ".jpg"}
+PATH_PREFIX = "static/invoices/"
+IMAGE_EXTENSIONS = {".png", ".jpg"}
+VARIANTS = ("full", "thumb", "original")
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# (path, mtime_ns, size) -> sha256 for files whose name isn't their digest
+_etag_cache = TTLCache(maxsize=4096, ttl=3600)
+
+
+def warn_if_images_unprocessed():
+    """Log at startup when Pillow is missing and image invoices won't be re-encoded"""
+    if Image is None:
+        logger.warning("Pillow is not installed; invoice images will be served as uploaded, "
+                       "without resizing or thumbnails")
+
+
+def invoice_store_dir():
+    return os.path.join(current_app.static_folder, "invoices")
+
+
+def blob_relpath(digest, extension):
+    """Sharded location of a blob relative to the invoice store"""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+def normalized_extension(filename):
+    return INVOICE_EXTENSIONS.get(os.path.splitext(filename or "")[1].lower(), "")
+
+
+def _store_stream(stream, extension):
+    """Copy stream into the store in chunks, hashing as it goes; return the invoice_path"""
+    store = invoice_store_dir()
+    os.makedirs(store, exist_ok=True)
+    digest = hashlib.sha256()
+    handle, temp_path = tempfile.mkstemp(dir=store, prefix=".upload-")
+    try:
+        with os.fdopen(handle, "wb") as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+
+        relpath = blob_relpath(digest.hexdigest(), extension)
+        final_path = os.path.join(store, relpath)
+        if os.path.exists(final_path):
+            # Already stored; refresh mtime so a concurrent GC keeps it
+            os.utime(final_path)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(temp_path, final_path)
+            temp_path = None
+    finally:
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+    return PATH_PREFIX + relpath
+
+
+def store_invoice(file_storage):
+    """Store an uploaded werkzeug FileStorage and return its invoice_path"""
+    return _store_stream(file_storage.stream, normalized_extension(file_storage.filename))
+
+
+def _is_blob(relpath):
+    """True for paths in the sharded digest layout, i.e. not legacy flat uploads"""
+    parts = relpath.split("/")
+    return len(parts) == 3 and len(parts[0]) == 2 and len(parts[1]) == 2 and parts[2].startswith(parts[0] + parts[1])
+
+
+def _is_variant(relpath):
+    return relpath.rsplit("/", 1)[-1].count(".") == 2
+
+
+def _blob_digest(relpath):
+    return relpath.rsplit("/", 1)[-1].split(".", 1)[0]
+
+
+def _variant_relpath(relpath, variant):
+    """aa/bb/<digest>.png -> aa/bb/<digest>.<variant>.<fmt>"""
+    extension = current_app.config.get("INVOICE_IMAGE_FORMAT", "WEBP").lower()
+    return f"{relpath.rsplit('.', 1)[0]}.{variant}.{extension}"
+
+
+def _save_image(image, path):
+    """Encode image with the configured format and quality, atomically"""
+    image_format = current_app.config.get("INVOICE_IMAGE_FORMAT", "WEBP")
+    if image_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".derive-")
+    try:
+        with os.fdopen(handle, "wb") as out:
+            image.save(out, format=image_format,
+                       quality=current_app.config.get("INVOICE_IMAGE_QUALITY", 80))
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def process_invoice(invoice_path):
+    """Write the compressed and thumbnail variants of an image invoice
+
+    Idempotent; returns True when the variants exist afterwards.
+    """
+    if Image is None or not invoice_path or not invoice_path.startswith(PATH_PREFIX):
+        return False
+    relpath = invoice_path[len(PATH_PREFIX):]
+    if not _is_blob(relpath) or os.path.splitext(relpath)[1] not in IMAGE_EXTENSIONS:
+        return False
+
+    store = invoice_store_dir()
+    source = os.path.join(store, relpath)
+    full_path = os.path.join(store, _variant_relpath(relpath, "full"))
+    thumb_path = os.path.join(store, _variant_relpath(relpath, "thumb"))
+
+    if not (os.path.exists(full_path) and os.path.exists(thumb_path)):
+        if not os.path.exists(source):
+            return False
+        config = current_app.config
+        try:
+            with Image.open(source) as image:
+                image = ImageOps.exif_transpose(image)
+                if image.mode not in ("RGB", "RGBA"):
+                    image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+                for path, side in ((full_path, config.get("INVOICE_MAX_SIDE", 2000)),
+                                   (thumb_path, config.get("INVOICE_THUMB_SIDE", 160))):
+                    variant = image.copy()
+                    variant.thumbnail((side, side))
+                    _save_image(variant, path)
+        except (OSError, Image.DecompressionBombError) as e:
+            logger.warning("Could not process invoice %s: %s", invoice_path, e)
+            return False
+
+    if (not current_app.config.get("INVOICE_KEEP_ORIGINALS", False)
+            and os.path.exists(source)
+            and os.path.getsize(full_path) < os.path.getsize(source)):
+        os.remove(source)
+    return True
+
+
+def resolve_invoice_file(relpath, size="full"):
+    """Pick the stored file to serve for relpath at size full, thumb or original
+
+    Falls back to whatever exists, so not-yet-processed uploads, PDFs and
+    legacy files still resolve to their original.
+    """
+    if size not in VARIANTS:
+        size = "full"
+    candidates = [relpath]
+    if _is_blob(relpath) and os.path.splitext(relpath)[1] in IMAGE_EXTENSIONS:
+        full, thumb = _variant_relpath(relpath, "full"), _variant_relpath(relpath, "thumb")
+        candidates = {
+            "thumb": [thumb, full, relpath],
+            "full": [full, relpath],
+            "original": [relpath, full],
+        }[size]
+    store = invoice_store_dir()
+    for candidate in candidates:
+        if os.path.exists(os.path.join(store, candidate)):
+            return candidate
+    return relpath
+
+
+def collect_garbage(grace_seconds=3600, dry_run=False):
+    """Delete blobs no Registration refers to and return their relative paths
+
+    Derived images live and die with their original's digest. Blobs younger
+    than grace_seconds are kept: their registration may not have committed yet.
+    """
+    store = invoice_store_dir()
+    referenced = {
+        _blob_digest(path)
+        for path in db.session.scalars(
+            select(Registration.invoice_path).where(Registration.invoice_path.is_not(None)).distinct()
+        )
+        if path.startswith(PATH_PREFIX)
+    }
+    cutoff = time.time() - grace_seconds
+    removed = []
+    for root, _, files in os.walk(store):
+        for name in files:
+            full_path = os.path.join(root, name)
+            relpath = os.path.relpath(full_path, store).replace(os.sep, "/")
+            if not _is_blob(relpath) or _blob_digest(relpath) in referenced:
+                continue
+            if os.path.getmtime(full_path) > cutoff:
+                continue
+            if not dry_run:
+                os.remove(full_path)
+            removed.append(relpath)
+    return removed
+
+
+def adopt_legacy_invoices():
+    """Move flat ``{user}_{event}_{name}`` uploads into the store; return (moved, missing)"""
+    store = invoice_store_dir()
+    moved, missing = 0, []
+    legacy = db.session.execute(
+        select(Registration.invoice_path).where(Registration.invoice_path.like(PATH_PREFIX + "%")).distinct()
+    ).scalars().all()
+    for old_path in legacy:
+        relpath = old_path[len(PATH_PREFIX):]
+        if _is_blob(relpath):
+            continue
+        source = os.path.join(store, relpath)
+        if not os.path.exists(source):
+            missing.append(old_path)
+            continue
+        with open(source, "rb") as stream:
+            new_path = _store_stream(stream, normalized_extension(relpath))
+        db.session.execute(
+            update(Registration).where(Registration.invoice_path == old_path).values(invoice_path=new_path)
+        )
+        db.session.commit()
+        os.remove(source)
+        moved += 1
+    return moved, missing
+
+
+def invoice_etag(relpath, path):
+    """Strong ETag from the file's content: the digest in its name, or a hash of it"""
+    if _is_blob(relpath) and not _is_variant(relpath):
+        return _blob_digest(relpath)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    etag = _etag_cache.get(key)
+    if etag is None:
+        digest = hashlib.sha256()
+        with open(path, "rb") as stream:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        etag = digest.hexdigest()
+        _etag_cache.set(key, etag)
+    return etag
+
+
+def send_invoice(relpath, size="full"):
+    """Response for an invoice file; raises NotFound if there isn't one
+
+    INVOICE_SENDFILE = 'x-sendfile' or 'x-accel-redirect' leaves the body
+    (and byte ranges) to the front server; 304s are still answered here.
+    """
+    config = current_app.config
+    relpath = resolve_invoice_file(relpath, size)
+    path = safe_join(invoice_store_dir(), relpath)
+    if path is None or not os.path.isfile(path):
+        raise NotFound()
+
+    mode = config.get("INVOICE_SENDFILE")
+    response = send_file(
+        path,
+        request.environ,
+        etag=invoice_etag(relpath, path),
+        conditional=mode is None,
+        use_x_sendfile=mode is not None,
+        response_class=current_app.response_class,
+    )
+    if mode is not None:
+        response = response.make_conditional(request.environ)
+        sendfile_path = response.headers.pop("X-Sendfile", None)
+        if response.status_code == 304:
+            sendfile_path = None
+        if sendfile_path and mode == "x-accel-redirect":
+            prefix = config.get("INVOICE_ACCEL_PREFIX", "/protected-invoices/").rstrip("/")
+            response.headers["X-Accel-Redirect"] = f"{prefix}/{quote(relpath)}"
+        elif sendfile_path:
+            response.headers["X-Sendfile"] = sendfile_path
+
+    # Digest-named PDFs and finished image variants never change at this URL;
+    # anything else (legacy files, images awaiting processing) is revalidated
+    response.cache_control.no_cache = None
+    response.cache_control.private = True
+    if _is_blob(relpath) and (_is_variant(relpath) or os.path.splitext(relpath)[1] not in IMAGE_EXTENSIONS):
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,36 @@
+"""Local background job runner.
+
+Work is handed to a bounded thread pool so long-running tasks (report
+builds, file post-processing) do not hold a request worker. Each job runs
+inside its own application context.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(app):
+    """Return the shared pool, creating it on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get("BACKGROUND_WORKERS", 2),
+                thread_name_prefix="dbs-jobs",
+            )
+        return _executor
+
+
+def submit(func, *args, **kwargs):
+    """Run func(*args, **kwargs) on the pool inside an app context"""
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            return func(*args, **kwargs)
+
+    return get_executor(app).submit(run)
@@ -0,0 +1,141 @@
+"""Live seat counts pushed to browsers over server-sent events.
+
+Every committed change to an event's registrations or capacity is published
+once to the process's ``SeatPublisher``: a numbered, bounded buffer of
+``{"id", "registered", "capacity", "available"}`` messages behind one
+condition variable. SSE listeners block on the condition and, when woken,
+slice the messages past their own position, so publishing costs the same
+for ten listeners as for ten thousand and no listener touches the database.
+
+Changes are collected per session: flushed Registration inserts/deletes and
+Event capacity edits are noted automatically, Core writes call
+``note_seat_change``. After the commit one query reads the new counts and
+publishes them; a rollback discards the notes.
+
+The publisher is per process. With several worker processes each one only
+sees its own commits, so run the stream on a single worker (or behind a
+shared broker) in multi-process deployments. Long-lived responses also need
+a threaded or async worker class.
+"""
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event as sa_event, inspect, select
+from sqlalchemy.orm import Session
+
+from models import db, Event, Registration
+
+SEAT_CHANGES_KEY = "seat_changes"
+
+
+class SeatPublisher:
+    """In-process broadcast of seat-count messages to any number of listeners"""
+
+    def __init__(self, backlog=1000):
+        self.backlog = backlog
+        self._condition = threading.Condition()
+        self._messages = []  # [(position, event_id, payload)], positions consecutive
+        self._latest = {}  # event_id -> last payload, for listeners that fell behind
+        self._position = 0
+
+    @property
+    def position(self):
+        """Number of messages published so far"""
+        return self._position
+
+    def publish(self, seats):
+        """Broadcast (event_id, registered, capacity) tuples"""
+        with self._condition:
+            for event_id, registered, capacity in seats:
+                self._position += 1
+                payload = {
+                    "id": event_id,
+                    "registered": registered,
+                    "capacity": capacity,
+                    "available": max(capacity - registered, 0),
+                }
+                self._messages.append((self._position, event_id, payload))
+                self._latest[event_id] = payload
+            if len(self._messages) > 2 * self.backlog:
+                del self._messages[:-self.backlog]
+            self._condition.notify_all()
+
+    def wait(self, after, event_ids=None, timeout=None):
+        """Return ``(position, payloads)`` published since after, waiting up to timeout
+
+        event_ids limits payloads to those events; only the newest payload
+        per event is returned. Messages for other events don't end the wait,
+        so an empty result means the timeout passed. A listener older than
+        the buffer gets the latest payload of every event instead.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                if self._position > after:
+                    position, payloads = self._position, self._since(after, event_ids)
+                    if payloads:
+                        return position, payloads
+                    after = position  # nothing for this listener; skip past it
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return after, []
+                self._condition.wait(remaining)
+
+    def _since(self, after, event_ids):
+        """Newest payload per event published after position after; call with the lock held"""
+        first = self._messages[0][0] if self._messages else self._position + 1
+        if after + 1 < first:
+            changed = self._latest.items()
+        else:
+            changed = ((event_id, payload) for _, event_id, payload in self._messages[after + 1 - first:])
+        newest = {}
+        for event_id, payload in changed:
+            if event_ids is None or event_id in event_ids:
+                newest[event_id] = payload
+        return list(newest.values())
+
+
+def init_seat_publisher(app):
+    """Create the app's SeatPublisher"""
+    publisher = SeatPublisher(backlog=app.config.get("SEAT_STREAM_BACKLOG", 1000))
+    app.extensions["seat_publisher"] = publisher
+    return publisher
+
+
+def note_seat_change(session, event_id):
+    """Publish event_id's seat count once session commits"""
+    session.info.setdefault(SEAT_CHANGES_KEY, set()).add(event_id)
+
+
+@sa_event.listens_for(Session, "after_flush")
+def _collect_seat_changes(session, flush_context):
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, Registration):
+            note_seat_change(session, obj.event_id)
+    for obj in session.dirty:
+        if isinstance(obj, Event) and inspect(obj).attrs.capacity.history.has_changes():
+            note_seat_change(session, obj.id)
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _publish_seat_changes(session):
+    event_ids = session.info.pop(SEAT_CHANGES_KEY, None)
+    if not event_ids or not has_app_context():
+        return
+    publisher = current_app.extensions.get("seat_publisher")
+    if publisher is None:
+        return
+    # The session can't run SQL after its commit; read on a fresh connection
+    event_table = Event.__table__
+    with db.engine.connect() as connection:
+        seats = connection.execute(
+            select(event_table.c.id, event_table.c.registered_count, event_table.c.capacity)
+            .where(event_table.c.id.in_(event_ids))
+        ).all()
+    publisher.publish(seats)
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _discard_seat_changes(session):
+    session.info.pop(SEAT_CHANGES_KEY, None)
@@ -2,12 +2,28 @@
 DBS Event Management System - Main Application
 A simple Flask application for managing events at Dublin Business School
 """
-from flask import Flask, send_from_directory
+from flask import Flask, request
 from flask_login import LoginManager
-from models import db, User, Society, Event, Registration
+from werkzeug.exceptions import NotFound
+from models import db, Event, Registration
 from datetime import datetime
 import os
 
+import click
+
+from backend.database import init_database
+from backend.fragments import init_fragment_cache
+from backend.hashing import HashingBusyError, init_password_hasher
+from backend.identity import configure_identity_cache, load_identity
+from backend.imports import StudentImportError, import_students, parse_student_file
+from backend.invoices import (
+    adopt_legacy_invoices, collect_garbage, process_invoice, send_invoice, warn_if_images_unprocessed,
+)
+from backend.instrumentation import init_instrumentation
+from backend.live import init_seat_publisher
+from backend.migrations import pending_migrations, upgrade_schema
+from backend.search import install_search_index, rebuild_search_index
+
 from backend.routes import (
     public_bp,
     admin_bp,
@@ -15,6 +31,8 @@ from backend.routes import (
     student_bp,
     exports_bp,
     registrations_bp,
+    api_bp,
+    live_bp,
 )
 
 # Paths for frontend assets (templates and static files)
@@ -25,20 +43,79 @@ STATIC_DIR = os.path.join(BASE_DIR, 'frontend', 'static')
 # Initialize Flask app pointing at the frontend folders
 app = Flask(__name__, template_folder=TEMPLATE_DIR, static_folder=STATIC_DIR)
 app.config['SECRET_KEY'] = 'dbs-event-system-secret-key-2025'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///events.db'
+# Database URL and tuning profile come from DATABASE_URL / DATABASE_PROFILE
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['BACKGROUND_WORKERS'] = 2
+app.config['EVENTS_PAGE_SIZE'] = 12
+app.config['DASHBOARD_STATS_TTL'] = 30  # seconds
+app.config['IDENTITY_CACHE_TTL'] = 60  # seconds; 0 disables the cache
+app.config['IDENTITY_CACHE_SIZE'] = 10000
+# Rendered event cards: 'memory' (per process), 'sqlite' (shared by the
+# workers on one host, stored at FRAGMENT_CACHE_PATH) or 'none'
+app.config['FRAGMENT_CACHE_BACKEND'] = os.environ.get('DBS_FRAGMENT_CACHE', 'memory')
+app.config['FRAGMENT_CACHE_PATH'] = os.path.join(app.instance_path, 'fragments.db')
+app.config['FRAGMENT_CACHE_SIZE'] = 5000
+# Bump to drop stored fragments when something other than the partial's own
+# source changes their markup (an included template, a filter)
+app.config['FRAGMENT_CACHE_VERSION'] = '1'
+# werkzeug method string, e.g. 'scrypt:16384:8:1' or 'pbkdf2:sha256:600000';
+# existing hashes are upgraded on the next successful login
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('DBS_PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+# Hashing runs on a process pool so login storms don't block request threads
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('DBS_PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 2) - 1)))
+app.config['PASSWORD_HASH_MAX_PENDING'] = 64
+app.config['PASSWORD_HASH_QUEUE_TIMEOUT'] = 10.0  # seconds
+# Admin uploads are imported within the request; larger files use `flask import-students`
+app.config['STUDENT_IMPORT_MAX_ROWS'] = 500
+app.config['REPORT_CACHE_DIR'] = os.path.join(app.instance_path, 'reports')
+# Queued/running export jobs older than this are treated as lost and re-run
+app.config['REPORT_JOB_TIMEOUT'] = 600  # seconds
+# Uploaded invoice images are re-encoded in the background, capped at
+# INVOICE_MAX_SIDE px, with INVOICE_THUMB_SIDE px thumbnails for listings
+app.config['INVOICE_IMAGE_FORMAT'] = 'WEBP'
+app.config['INVOICE_IMAGE_QUALITY'] = 80
+app.config['INVOICE_MAX_SIDE'] = 2000
+app.config['INVOICE_THUMB_SIDE'] = 160
+app.config['INVOICE_KEEP_ORIGINALS'] = False
+# 'x-sendfile' (Apache/lighttpd) or 'x-accel-redirect' (nginx, internal
+# location INVOICE_ACCEL_PREFIX aliased to frontend/static/invoices) lets the
+# front server stream invoice bytes; unset, Flask serves them itself
+app.config['INVOICE_SENDFILE'] = os.environ.get('DBS_INVOICE_SENDFILE') or None
+app.config['INVOICE_ACCEL_PREFIX'] = '/protected-invoices/'
+# Live seat counts over server-sent events (/live/seats): keepalive comment
+# interval, stream lifetime before the browser reconnects, and how many
+# messages a briefly disconnected listener can catch up on
+app.config['SEAT_STREAM_HEARTBEAT'] = 15  # seconds
+app.config['SEAT_STREAM_MAX_SECONDS'] = 300
+app.config['SEAT_STREAM_BACKLOG'] = 1000
+# Per-request SQL instrumentation and slow-query log (off unless requested)
+app.config['SQL_INSTRUMENTATION'] = os.environ.get('DBS_SQL_INSTRUMENTATION') == '1'
+app.config['SLOW_QUERY_THRESHOLD_MS'] = float(os.environ.get('DBS_SLOW_QUERY_MS', 100))
+app.config['SLOW_QUERY_LOG'] = os.path.join(app.instance_path, 'slow_queries.log')
 
 # Initialize extensions
-db.init_app(app)
+init_database(app, db)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'public.login'
+init_instrumentation(app)
+configure_identity_cache(app)
+init_password_hasher(app)
+init_fragment_cache(app)
+init_seat_publisher(app)
+warn_if_images_unprocessed()
 
 
 @login_manager.user_loader
 def load_user(user_id):
-    """Load user by ID for Flask-Login"""
-    return User.query.get(int(user_id))
+    """Load a cached identity snapshot by ID for Flask-Login"""
+    return load_identity(user_id)
+
+
+@app.errorhandler(HashingBusyError)
+def hashing_busy(error):
+    """Shed load when the password hashing queue is saturated"""
+    return "Too many sign-ins right now, please try again in a moment", 503, {"Retry-After": "5"}
 
 
 # Register blueprints
@@ -48,18 +125,18 @@ app.register_blueprint(organizer_bp)
 app.register_blueprint(student_bp)
 app.register_blueprint(exports_bp)
 app.register_blueprint(registrations_bp)
+app.register_blueprint(api_bp)
+app.register_blueprint(live_bp)
 
 
 # ============== INVOICE SERVING ROUTE ==============
 
-@app.route('/invoices/<filename>')
+@app.route('/invoices/<path:filename>')
 def serve_invoice(filename):
-    """Serve invoice files securely"""
-    invoices_dir = os.path.join(app.static_folder, 'invoices')
+    """Serve invoice files securely; ?size=thumb|full|original picks the image variant"""
     try:
-        return send_from_directory(invoices_dir, filename)
-    except (FileNotFoundError, Exception) as e:
-        # Handle both standard FileNotFoundError and Werkzeug NotFound
+        return send_invoice(filename, request.args.get('size', 'full'))
+    except NotFound:
         return "Invoice file not found", 404
 
 
@@ -68,6 +145,96 @@ def serve_invoice(filename):
 def init_db():
     """Initialize database with empty schema"""
     with app.app_context():
-        db.create_all()
+        apply_migrations()
         print("Database initialized with empty schema")
         print("Visit http://localhost:5000/ to create first admin account")
+
+
+def apply_migrations():
+    """Create missing tables, then apply pending schema migrations"""
+    db.create_all()
+    applied = upgrade_schema()
+    for description in applied:
+        print(f"Applied migration: {description}")
+    return applied
+
+
+def warn_if_schema_outdated():
+    """Log at startup when the database still needs `flask upgrade-db`"""
+    with app.app_context():
+        pending = pending_migrations()
+    if pending:
+        app.logger.warning("Database schema is out of date (%s); run 'flask upgrade-db'", ", ".join(pending))
+
+
+warn_if_schema_outdated()
+
+
+@app.cli.command("upgrade-db")
+def upgrade_db_command():
+    """Create missing tables and apply pending schema migrations"""
+    applied = apply_migrations()
+    print(f"Database schema up to date ({len(applied)} migration(s) applied)")
+
+
+@app.cli.command("reconcile-counts")
+def reconcile_counts_command():
+    """Recompute every event's stored registration count"""
+    fixed = Event.reconcile_registered_counts()
+    db.session.commit()
+    print(f"Reconciled registration counts for {fixed} event(s)")
+
+
+@app.cli.command("rebuild-search-index")
+def rebuild_search_index_command():
+    """Recreate the full-text event search index from the event table"""
+    with db.engine.begin() as connection:
+        install_search_index(connection)
+        indexed = rebuild_search_index(connection)
+    print(f"Indexed {indexed} event(s) for search")
+
+
+@app.cli.command("import-students")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--batch-size", default=1000, show_default=True, help="Rows per insert transaction")
+def import_students_command(path, batch_size):
+    """Bulk-create students from a CSV or JSON file"""
+    with open(path, "rb") as stream:
+        try:
+            rows = parse_student_file(stream, path)
+        except StudentImportError as e:
+            raise click.ClickException(str(e))
+    report = import_students(rows, batch_size=batch_size)
+    for line, message in report.errors:
+        print(f"line {line}: {message}")
+    print(f"Imported {report.created} of {report.rows} student(s), {len(report.errors)} rejected")
+
+
+@app.cli.command("gc-invoices")
+@click.option("--grace", default=3600, show_default=True, help="Keep blobs modified within this many seconds")
+@click.option("--dry-run", is_flag=True, help="List unreferenced blobs without deleting them")
+def gc_invoices_command(grace, dry_run):
+    """Delete stored invoice blobs no registration refers to"""
+    removed = collect_garbage(grace_seconds=grace, dry_run=dry_run)
+    for relpath in removed:
+        print(relpath)
+    print(f"{'Would remove' if dry_run else 'Removed'} {len(removed)} unreferenced invoice(s)")
+
+
+@app.cli.command("migrate-invoices")
+def migrate_invoices_command():
+    """Move legacy per-registration invoice files into the content-addressed store"""
+    moved, missing = adopt_legacy_invoices()
+    for path in missing:
+        print(f"missing: {path}")
+    print(f"Moved {moved} legacy invoice file(s) into the store")
+
+
+@app.cli.command("process-invoices")
+def process_invoices_command():
+    """Create compressed and thumbnail variants for every stored image invoice"""
+    paths = db.session.scalars(
+        db.select(Registration.invoice_path).where(Registration.invoice_path.is_not(None)).distinct()
+    ).all()
+    processed = sum(1 for path in paths if process_invoice(path))
+    print(f"Processed {processed} of {len(paths)} invoice(s)")
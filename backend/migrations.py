@@ -0,0 +1,103 @@
+"""Lightweight schema migrations for the SQLite database.
+
+``db.create_all()`` only creates missing tables, so columns and indexes added
+after a database was first initialised are applied here. Each step is
+idempotent and the last applied version is tracked in ``PRAGMA user_version``.
+
+``python app.py`` applies them on start; deployments running the app under
+``flask run`` or a WSGI server apply them with ``flask upgrade-db``, and the
+app logs a warning at startup while any are outstanding.
+"""
+from sqlalchemy import inspect
+
+from backend.search import install_search_index, rebuild_search_index
+from models import db
+
+
+def _add_event_registered_count(connection):
+    """Add Event.registered_count and backfill it from the registration table"""
+    columns = {col["name"] for col in inspect(connection).get_columns("event")}
+    if "registered_count" not in columns:
+        connection.exec_driver_sql(
+            "ALTER TABLE event ADD COLUMN registered_count INTEGER NOT NULL DEFAULT 0"
+        )
+    connection.exec_driver_sql(
+        "UPDATE event SET registered_count = "
+        "(SELECT COUNT(*) FROM registration WHERE registration.event_id = event.id)"
+    )
+
+
+def _add_event_registrations_version(connection):
+    """Add Event.registrations_version used to key cached reports"""
+    columns = {col["name"] for col in inspect(connection).get_columns("event")}
+    if "registrations_version" not in columns:
+        connection.exec_driver_sql(
+            "ALTER TABLE event ADD COLUMN registrations_version INTEGER NOT NULL DEFAULT 0"
+        )
+
+
+def _add_event_updated_at(connection):
+    """Add Event.updated_at, the per-row stamp keying cached event fragments"""
+    columns = {col["name"] for col in inspect(connection).get_columns("event")}
+    if "updated_at" not in columns:
+        connection.exec_driver_sql("ALTER TABLE event ADD COLUMN updated_at DATETIME")
+    connection.exec_driver_sql(
+        "UPDATE event SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL"
+    )
+
+
+def _add_event_search(connection):
+    """Create the FTS5 event search index and its triggers, then fill it"""
+    install_search_index(connection)
+    rebuild_search_index(connection)
+
+
+# Must match the indexes declared in models.py
+HOT_COLUMN_INDEXES = [
+    ("ix_registration_student_id", "registration", "student_id"),
+    ("ix_event_event_date", "event", "event_date"),
+    ("ix_event_created_by_event_date", "event", "created_by, event_date"),
+    ("ix_event_society_id", "event", "society_id"),
+    ("ix_society_society_head_id", "society", "society_head_id"),
+    ("ix_user_role", "user", "role"),
+]
+
+
+def _add_hot_column_indexes(connection):
+    """Index the columns listing and dashboard queries filter and sort on"""
+    for name, table, columns in HOT_COLUMN_INDEXES:
+        connection.exec_driver_sql(f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" ({columns})')
+    connection.exec_driver_sql("ANALYZE")
+
+
+# (version, description, step) - append only, never renumber
+MIGRATIONS = [
+    (1, "event.registered_count", _add_event_registered_count),
+    (2, "event.registrations_version", _add_event_registrations_version),
+    (3, "indexes on hot lookup columns", _add_hot_column_indexes),
+    (4, "event.updated_at", _add_event_updated_at),
+    (5, "event full-text search index", _add_event_search),
+]
+
+
+def upgrade_schema(engine=None):
+    """Apply every migration newer than the database's recorded version"""
+    engine = engine or db.engine
+    applied = []
+    with engine.begin() as connection:
+        current = connection.exec_driver_sql("PRAGMA user_version").scalar() or 0
+        for version, description, step in MIGRATIONS:
+            if version <= current:
+                continue
+            step(connection)
+            connection.exec_driver_sql(f"PRAGMA user_version = {version}")
+            applied.append(description)
+    return applied
+
+
+def pending_migrations(engine=None):
+    """Descriptions of the migrations the database hasn't had yet"""
+    engine = engine or db.engine
+    with engine.connect() as connection:
+        current = connection.exec_driver_sql("PRAGMA user_version").scalar() or 0
+    return [description for version, description, _ in MIGRATIONS if version > current]
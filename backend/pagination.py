@@ -0,0 +1,70 @@
+"""Keyset (seek) pagination helpers.
+
+Pages are addressed by an opaque cursor holding the sort key of the last
+row served, so fetching page N costs the same as fetching page 1.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(values):
+    """Pack sort-key values (ints, strings, datetimes) into a URL-safe token"""
+    packed = [{"dt": v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(packed, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _unpack_value(value):
+    """One cursor value: a string, a number or ``{"dt": isoformat}``"""
+    if isinstance(value, dict) and value.keys() == {"dt"} and isinstance(value["dt"], str):
+        return datetime.fromisoformat(value["dt"])
+    if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+        return value
+    raise ValueError(f"unsupported cursor value {value!r}")
+
+
+def decode_cursor(token):
+    """Inverse of encode_cursor; raises ValueError for malformed tokens"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        packed = json.loads(raw)
+    except (binascii.Error, json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ValueError(f"invalid cursor: {e}") from e
+    if not isinstance(packed, list):
+        raise ValueError("cursor must encode a list")
+    return [_unpack_value(v) for v in packed]
+
+
+def _after(columns, values, descending):
+    """WHERE clause selecting rows strictly after ``values`` in sort order"""
+    clauses = []
+    for i, column in enumerate(columns):
+        beyond = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*[c == v for c, v in zip(columns[:i], values[:i])], beyond))
+    return or_(*clauses)
+
+
+def keyset_page(query, columns, cursor=None, page_size=20, descending=True):
+    """Return ``(rows, next_cursor)`` for one page of an ORM query.
+
+    ``columns`` must form a unique sort key (end with the primary key).
+    ``rows`` are entities whose attributes match the column keys.
+    """
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(columns):
+            raise ValueError("cursor does not match sort key")
+        query = query.filter(_after(columns, values, descending))
+    ordering = [c.desc() if descending else c.asc() for c in columns]
+    rows = query.order_by(*ordering).limit(page_size + 1).all()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+    return rows, next_cursor
@@ -6,6 +6,8 @@ from .organizer import organizer_bp
 from .student import student_bp
 from .exports import exports_bp
 from .registrations import registrations_bp
+from .api import api_bp
+from .live import live_bp
 
 __all__ = [
     "public_bp",
@@ -14,4 +16,6 @@ __all__ = [
     "student_bp",
     "exports_bp",
     "registrations_bp",
+    "api_bp",
+    "live_bp",
 ]
@@ -1,10 +1,13 @@
 from datetime import datetime
 
-from flask import Blueprint, flash, redirect, render_template, request, url_for
+from flask import Blueprint, current_app, flash, redirect, render_template, request, url_for
 from flask_login import current_user
+from sqlalchemy.orm import joinedload, undefer
 
 from backend.decorators import admin_required
-from models import db, Event, Society, User, Registration
+from backend.imports import StudentImportError, import_students, parse_student_file
+from backend.stats import dashboard_stats
+from models import db, Event, Society, User
 
 
 admin_bp = Blueprint("admin", __name__)
@@ -14,20 +17,16 @@ admin_bp = Blueprint("admin", __name__)
 @admin_required
 def admin_dashboard():
     """Admin dashboard with system overview"""
-    total_users = User.query.count()
-    total_societies = Society.query.count()
-    total_events = Event.query.count()
-    total_registrations = Registration.query.count()
-
-    recent_events = Event.query.order_by(Event.created_at.desc()).limit(5).all()
+    stats = dashboard_stats()
 
     return render_template(
         "admin/dashboard.html",
-        total_users=total_users,
-        total_societies=total_societies,
-        total_events=total_events,
-        total_registrations=total_registrations,
-        recent_events=recent_events,
+        stats=stats,
+        total_users=stats.total_users,
+        total_societies=stats.total_societies,
+        total_events=stats.total_events,
+        total_registrations=stats.total_registrations,
+        recent_events=stats.recent_events,
     )
 
 
@@ -60,6 +59,37 @@ def admin_add_student():
     return render_template("admin/add_student.html")
 
 
+@admin_bp.route("/admin/import-students", methods=["GET", "POST"], endpoint="admin_import_students")
+@admin_required
+def admin_import_students():
+    """Bulk-create students from an uploaded CSV or JSON file"""
+    report = None
+    if request.method == "POST":
+        upload = request.files.get("file")
+        if not upload or not upload.filename:
+            flash("Choose a CSV or JSON file to import", "danger")
+            return render_template("admin/import_students.html")
+
+        try:
+            rows = parse_student_file(upload.stream, upload.filename)
+        except StudentImportError as e:
+            flash(str(e), "danger")
+            return render_template("admin/import_students.html")
+
+        # Hashing runs inside this request; term-sized files go through the CLI
+        max_rows = current_app.config.get("STUDENT_IMPORT_MAX_ROWS", 500)
+        if len(rows) > max_rows:
+            flash(f"This file has {len(rows)} rows; uploads are limited to {max_rows}. "
+                  "Split it, or run 'flask import-students' on the server.", "danger")
+            return render_template("admin/import_students.html")
+
+        report = import_students(rows)
+        flash(f"Imported {report.created} of {report.rows} students",
+              "success" if not report.errors else "warning")
+
+    return render_template("admin/import_students.html", report=report)
+
+
 @admin_bp.route("/admin/edit-student/<int:student_id>", methods=["GET", "POST"], endpoint="admin_edit_student")
 @admin_required
 def admin_edit_student(student_id):
@@ -151,7 +181,7 @@ def admin_add_admin():
 @admin_required
 def admin_organizers():
     """List all organizers"""
-    organizers = User.query.filter_by(role="organizer").all()
+    organizers = User.query.filter_by(role="organizer").options(undefer(User.society_count)).all()
     return render_template("admin/organizers.html", organizers=organizers)
 
 
@@ -294,7 +324,7 @@ def admin_delete_society(society_id):
 @admin_required
 def admin_societies():
     """List all societies"""
-    societies = Society.query.all()
+    societies = Society.query.options(joinedload(Society.head), undefer(Society.event_count)).all()
     return render_template("admin/societies.html", societies=societies)
 
 
@@ -392,8 +422,8 @@ def admin_edit_event(event_id):
         cost = float(request.form.get("cost")) if is_paid else 0.0
 
         # Check if new capacity is less than current registrations
-        if int(capacity) < len(event.registrations):
-            flash(f"Cannot reduce capacity to {capacity}. Event already has {len(event.registrations)} registrations.", "danger")
+        if int(capacity) < event.get_registered_count():
+            flash(f"Cannot reduce capacity to {capacity}. Event already has {event.get_registered_count()} registrations.", "danger")
             return render_template("admin/edit_event.html", event=event, societies=societies)
 
         # Convert date string to datetime
@@ -0,0 +1,196 @@
+"""Read-only JSON API, version 1.
+
+Kiosk displays and the mobile wrapper use these instead of scraping pages.
+Listings take ``fields=id,title,...`` to trim each item and page with the
+same opaque keyset cursors as the HTML views. Every response carries a weak
+ETag built from the served rows' update stamps (``Event.updated_at`` and
+``registrations_version``), so a client repeating a request with
+If-None-Match gets an empty 304 until one of those rows changes.
+"""
+import hashlib
+from datetime import datetime
+
+from flask import Blueprint, current_app, jsonify, request, url_for
+from flask_login import current_user
+from sqlalchemy.orm import joinedload
+from werkzeug.exceptions import HTTPException
+
+from backend.fragments import event_stamp
+from backend.pagination import keyset_page
+from models import db, Event, Registration
+
+API_VERSION = "v1"
+
+api_bp = Blueprint("api", __name__, url_prefix=f"/api/{API_VERSION}")
+
+EVENT_FIELDS = {
+    "id": lambda e: e.id,
+    "title": lambda e: e.title,
+    "description": lambda e: e.description,
+    "event_date": lambda e: e.event_date.isoformat(),
+    "location": lambda e: e.location,
+    "capacity": lambda e: e.capacity,
+    "registered_count": lambda e: e.get_registered_count(),
+    "available_slots": lambda e: e.available_slots(),
+    "is_full": lambda e: e.is_full(),
+    "is_paid": lambda e: bool(e.is_paid),
+    "cost": lambda e: e.cost,
+    "society": lambda e: e.society.name if e.society else None,
+    "updated_at": lambda e: e.updated_at.isoformat() if e.updated_at else None,
+}
+
+REGISTRATION_FIELDS = {
+    "id": lambda r: r.id,
+    "registration_date": lambda r: r.registration_date.isoformat() if r.registration_date else None,
+    "payment_method": lambda r: r.payment_method,
+    "has_invoice": lambda r: bool(r.invoice_path),
+}
+
+
+class ApiError(Exception):
+    """Turned into a JSON error response by the blueprint"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+@api_bp.errorhandler(ApiError)
+def _api_error(error):
+    return jsonify(error=error.message), error.status
+
+
+@api_bp.errorhandler(HTTPException)
+def _http_error(error):
+    return jsonify(error=error.description), error.code
+
+
+def _selected_fields(available):
+    """Field names from ?fields=, defaulting to all of them in declaration order"""
+    raw = request.args.get("fields")
+    if not raw:
+        return list(available)
+    fields = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(available)}")
+    return fields
+
+
+def _serialize(obj, fields, available):
+    return {name: available[name](obj) for name in fields}
+
+
+def _page_size():
+    config = current_app.config
+    limit = request.args.get("limit", type=int)
+    if not limit:
+        return config.get("EVENTS_PAGE_SIZE", 12)
+    return max(1, min(limit, config.get("EVENTS_PAGE_SIZE_MAX", 100)))
+
+
+def _weak_etag(*parts):
+    digest = hashlib.sha1(API_VERSION.encode())
+    for part in parts:
+        digest.update(b"\0" + str(part).encode())
+    return digest.hexdigest()
+
+
+def _conditional(etag, build, private=False):
+    """304 if the client already has etag, otherwise the JSON built by build()"""
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag, weak=True)
+    # Clients may keep a copy but must revalidate it every time
+    response.cache_control.no_cache = True
+    if private:
+        response.cache_control.private = True
+        response.vary.add("Cookie")
+    else:
+        response.cache_control.public = True
+    return response
+
+
+def _next_url(next_cursor):
+    if not next_cursor:
+        return None
+    args = request.args.to_dict()
+    args["cursor"] = next_cursor
+    return url_for(request.endpoint, **args)
+
+
+@api_bp.route("/events", endpoint="events")
+def events():
+    """Events by date: upcoming (default, soonest first), past or all (newest first)"""
+    fields = _selected_fields(EVENT_FIELDS)
+    scope = request.args.get("scope", "upcoming")
+    query = Event.query.options(joinedload(Event.society))
+    if scope == "upcoming":
+        query = query.filter(Event.event_date >= datetime.utcnow())
+    elif scope == "past":
+        query = query.filter(Event.event_date < datetime.utcnow())
+    elif scope != "all":
+        raise ApiError("scope must be upcoming, past or all")
+
+    try:
+        rows, next_cursor = keyset_page(query, [Event.event_date, Event.id], request.args.get("cursor"),
+                                        _page_size(), descending=scope != "upcoming")
+    except ValueError:
+        raise ApiError("Invalid cursor")
+
+    etag = _weak_etag(",".join(fields), next_cursor, *(f"{e.id}:{event_stamp(e)}" for e in rows))
+    return _conditional(etag, lambda: {
+        "events": [_serialize(e, fields, EVENT_FIELDS) for e in rows],
+        "next_cursor": next_cursor,
+        "next_url": _next_url(next_cursor),
+    })
+
+
+@api_bp.route("/events/<int:event_id>", endpoint="event")
+def event(event_id):
+    """One event with its live seat counts"""
+    fields = _selected_fields(EVENT_FIELDS)
+    row = db.get_or_404(Event, event_id, description="Event not found")
+    etag = _weak_etag(",".join(fields), f"{row.id}:{event_stamp(row)}")
+    return _conditional(etag, lambda: {"event": _serialize(row, fields, EVENT_FIELDS)})
+
+
+@api_bp.route("/me/registrations", endpoint="my_registrations")
+def my_registrations():
+    """The signed-in student's registrations, most recent first, each with its event"""
+    if not current_user.is_authenticated:
+        raise ApiError("Sign in required", 401)
+    if current_user.role != "student":
+        raise ApiError("Student account required", 403)
+
+    fields = _selected_fields(REGISTRATION_FIELDS)
+    event_fields = [name.strip() for name in request.args.get("event_fields", "").split(",") if name.strip()]
+    unknown = [name for name in event_fields if name not in EVENT_FIELDS]
+    if unknown:
+        raise ApiError(f"Unknown event field(s): {', '.join(unknown)}")
+    event_fields = event_fields or ["id", "title", "event_date", "location", "available_slots"]
+
+    query = Registration.query.filter_by(student_id=current_user.id).options(
+        joinedload(Registration.event).joinedload(Event.society)
+    )
+    try:
+        rows, next_cursor = keyset_page(query, [Registration.registration_date, Registration.id],
+                                        request.args.get("cursor"), _page_size())
+    except ValueError:
+        raise ApiError("Invalid cursor")
+
+    etag = _weak_etag(
+        current_user.id, ",".join(fields), ",".join(event_fields), next_cursor,
+        *(f"{r.id}:{r.event_id}:{event_stamp(r.event)}" for r in rows),
+    )
+    return _conditional(etag, lambda: {
+        "registrations": [
+            dict(_serialize(r, fields, REGISTRATION_FIELDS), event=_serialize(r.event, event_fields, EVENT_FIELDS))
+            for r in rows
+        ],
+        "next_cursor": next_cursor,
+        "next_url": _next_url(next_cursor),
+    }, private=True)
@@ -1,13 +1,41 @@
-from flask import Blueprint, flash, redirect, url_for
+import os
+
+from flask import Blueprint, flash, jsonify, redirect, send_file, url_for
 from flask_login import current_user, login_required
 
-from export_routes import export_registrations_csv, export_registrations_pdf
-from models import Event
+from export_routes import (
+    enqueue_pdf_report,
+    export_registrations_csv,
+    export_registrations_pdf,
+    report_cache_dir,
+)
+from models import db, Event, ReportJob
 
 
 exports_bp = Blueprint("exports", __name__)
 
 
+def _can_export(event):
+    """Admins may export any event, organizers only their own"""
+    if current_user.role == "superadmin":
+        return True
+    return current_user.role == "organizer" and event.created_by == current_user.id
+
+
+def _job_payload(job):
+    payload = {
+        "id": job.id,
+        "event_id": job.event_id,
+        "status": job.status,
+        "status_url": url_for("exports.report_job_status", job_id=job.id),
+    }
+    if job.status == "done":
+        payload["download_url"] = url_for("exports.report_job_download", job_id=job.id)
+    if job.status == "failed":
+        payload["error"] = job.error
+    return payload
+
+
 @exports_bp.route("/event/<int:event_id>/export/csv", endpoint="export_csv")
 @login_required
 def export_csv(event_id):
@@ -42,3 +70,55 @@ def export_pdf(event_id):
         return redirect(url_for("organizer.organizer_dashboard"))
 
     return export_registrations_pdf(event_id)
+
+
+@exports_bp.route("/event/<int:event_id>/export/pdf/jobs", methods=["POST"], endpoint="enqueue_pdf")
+@login_required
+def enqueue_pdf(event_id):
+    """Queue a background PDF export and return its job status"""
+    event = Event.query.get_or_404(event_id)
+    if not _can_export(event):
+        return jsonify(error="Access denied"), 403
+
+    job = enqueue_pdf_report(event, requested_by=current_user.id)
+    return jsonify(_job_payload(job)), 202
+
+
+@exports_bp.route("/export/jobs/<job_id>", endpoint="report_job_status")
+@login_required
+def report_job_status(job_id):
+    """Poll the status of a background export"""
+    job = ReportJob.query.get_or_404(job_id)
+    event = db.session.get(Event, job.event_id)
+    if event is None:
+        return jsonify(error="Event no longer exists"), 404
+    if not _can_export(event):
+        return jsonify(error="Access denied"), 403
+
+    return jsonify(_job_payload(job))
+
+
+@exports_bp.route("/export/jobs/<job_id>/download", endpoint="report_job_download")
+@login_required
+def report_job_download(job_id):
+    """Download the PDF produced by a finished export job"""
+    job = ReportJob.query.get_or_404(job_id)
+    event = db.session.get(Event, job.event_id)
+    if event is None:
+        return jsonify(error="Event no longer exists"), 404
+    if not _can_export(event):
+        return jsonify(error="Access denied"), 403
+    if job.status != "done":
+        return jsonify(_job_payload(job)), 409
+
+    path = os.path.join(report_cache_dir(), job.file_name)
+    if not os.path.exists(path):
+        # Superseded by a newer report for this event
+        return jsonify(error="Report expired, request a new export"), 410
+
+    return send_file(
+        path,
+        mimetype="application/pdf",
+        as_attachment=True,
+        download_name=f"event_{job.event_id}_registrations.pdf",
+    )
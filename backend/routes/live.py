@@ -0,0 +1,52 @@
+import json
+import time
+
+from flask import Blueprint, current_app, request
+
+live_bp = Blueprint("live", __name__)
+
+MAX_EVENT_IDS = 500
+
+
+@live_bp.route("/live/seats", endpoint="seats")
+def seats():
+    """Server-sent stream of seat counts as registrations commit
+
+    ``?events=1,2,3`` limits the stream to those events. A new listener first
+    gets the latest published count of each of them, which covers anything
+    committed between rendering the page and connecting. Message ids are
+    publisher positions, so a reconnecting EventSource resumes from its
+    Last-Event-ID. Streams end after SEAT_STREAM_MAX_SECONDS and the browser
+    reconnects.
+    """
+    config = current_app.config
+    publisher = current_app.extensions["seat_publisher"]
+
+    event_ids = None
+    if request.args.get("events"):
+        event_ids = {int(part) for part in request.args["events"].split(",")[:MAX_EVENT_IDS] if part.isdigit()}
+    position = request.headers.get("Last-Event-ID", 0, type=int)
+    if not 0 <= position <= publisher.position:
+        position = 0
+
+    heartbeat = config.get("SEAT_STREAM_HEARTBEAT", 15)
+    deadline = time.monotonic() + config.get("SEAT_STREAM_MAX_SECONDS", 300)
+
+    def stream(position):
+        yield f"retry: {config.get('SEAT_STREAM_RETRY_MS', 3000)}\n\n"
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            # Returns early only for changes to these events; empty means the heartbeat is due
+            position, changes = publisher.wait(position, event_ids, min(heartbeat, remaining))
+            if not changes:
+                yield ": keepalive\n\n"
+            for payload in changes:
+                yield f"id: {position}\nevent: seats\ndata: {json.dumps(payload)}\n\n"
+
+    response = current_app.response_class(stream(position), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # Don't let nginx buffer the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
@@ -85,8 +85,8 @@ def organizer_edit_event(event_id):
         cost = float(request.form.get("cost")) if is_paid else 0.0
 
         # Check if new capacity is less than current registrations
-        if int(capacity) < len(event.registrations):
-            flash(f"Cannot reduce capacity to {capacity}. Event already has {len(event.registrations)} registrations.", "danger")
+        if int(capacity) < event.get_registered_count():
+            flash(f"Cannot reduce capacity to {capacity}. Event already has {event.get_registered_count()} registrations.", "danger")
             return render_template("organizer/edit_event.html", event=event, society=society)
 
         event_date_obj = datetime.strptime(event_date, "%Y-%m-%dT%H:%M")
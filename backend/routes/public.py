@@ -1,7 +1,12 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash
+from datetime import date
+
+from flask import Blueprint, current_app, render_template, redirect, url_for, request, flash, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
+from sqlalchemy.orm import joinedload, load_only
 
-from models import db, User, Event
+from backend.pagination import keyset_page
+from backend.search import search_events
+from models import db, User, Event, Society
 
 
 public_bp = Blueprint("public", __name__)
@@ -46,6 +51,33 @@ def setup():
     return render_template("setup.html")
 
 
+def _events_page(cursor):
+    """One keyset page of events, newest first, ordered by (event_date, id)"""
+    page_size = current_app.config.get("EVENTS_PAGE_SIZE", 12)
+    limit = request.args.get("limit", type=int)
+    if limit:
+        page_size = max(1, min(limit, current_app.config.get("EVENTS_PAGE_SIZE_MAX", 100)))
+    query = Event.query.options(joinedload(Event.society))
+    return keyset_page(query, [Event.event_date, Event.id], cursor, page_size)
+
+
+def _event_summary(event):
+    """JSON-serialisable view of an event card"""
+    return {
+        "id": event.id,
+        "title": event.title,
+        "description": event.description,
+        "event_date": event.event_date.isoformat(),
+        "location": event.location,
+        "capacity": event.capacity,
+        "registered_count": event.get_registered_count(),
+        "available_slots": event.available_slots(),
+        "is_paid": event.is_paid,
+        "cost": event.cost,
+        "society": event.society.name if event.society else None,
+    }
+
+
 @public_bp.route("/", endpoint="index")
 def index():
     """Public homepage with role-based redirection"""
@@ -61,9 +93,67 @@ def index():
             # Fallback to public dashboard if role is unknown
             return redirect(url_for("public.dashboard"))
     
-    # Show public homepage for non-authenticated users
-    events = Event.query.order_by(Event.event_date.desc()).all()
-    return render_template("index.html", events=events)
+    # Show public homepage for non-authenticated users, one page at a time
+    try:
+        events, next_cursor = _events_page(request.args.get("cursor"))
+    except ValueError:
+        events, next_cursor = _events_page(None)
+    return render_template("index.html", events=events, next_cursor=next_cursor)
+
+
+@public_bp.route("/events.json", endpoint="events_json")
+def events_json():
+    """JSON variant of the public event listing"""
+    try:
+        events, next_cursor = _events_page(request.args.get("cursor"))
+    except ValueError:
+        return jsonify(error="Invalid cursor"), 400
+    return jsonify(
+        events=[_event_summary(event) for event in events],
+        next_cursor=next_cursor,
+        next_url=url_for("public.events_json", cursor=next_cursor, limit=request.args.get("limit")) if next_cursor else None,
+    )
+
+
+def _search_filters():
+    """search_events() keyword arguments from the query string; bad values are ignored"""
+    price = request.args.get("price")
+    return {
+        "query_text": request.args.get("q", "").strip(),
+        "date_from": request.args.get("from", type=date.fromisoformat),
+        "date_to": request.args.get("to", type=date.fromisoformat),
+        "society_id": request.args.get("society", type=int),
+        "price": price if price in ("free", "paid") else None,
+        "max_cost": request.args.get("max_cost", type=float),
+    }
+
+
+def _search_page():
+    page = request.args.get("page", 1, type=int)
+    page_size = current_app.config.get("EVENTS_PAGE_SIZE", 12)
+    events, has_more = search_events(**_search_filters(), page=page, page_size=page_size)
+    next_url = None
+    if has_more:
+        args = request.args.to_dict()
+        args["page"] = max(page, 1) + 1
+        next_url = url_for(request.endpoint, **args)
+    return events, next_url
+
+
+@public_bp.route("/events/search", endpoint="search")
+def search():
+    """Full-text event search with date, society and price filters"""
+    events, next_url = _search_page()
+    societies = Society.query.options(load_only(Society.id, Society.name)).order_by(Society.name).all()
+    return render_template("search.html", events=events, next_url=next_url,
+                           societies=societies, filters=_search_filters())
+
+
+@public_bp.route("/events/search.json", endpoint="search_json")
+def search_json():
+    """JSON variant of the event search"""
+    events, next_url = _search_page()
+    return jsonify(events=[_event_summary(event) for event in events], next_url=next_url)
 
 
 @public_bp.route("/login", methods=["GET", "POST"], endpoint="login")
@@ -79,6 +169,10 @@ def login():
         user = User.query.filter_by(email=email).first()
 
         if user and user.check_password(password):
+            # Upgrade hashes stored under outdated parameters while we have the plaintext
+            if user.needs_rehash():
+                user.set_password(password)
+                db.session.commit()
             login_user(user)
             flash(f"Welcome back, {user.name}!", "success")
             return redirect(url_for("public.dashboard"))
@@ -1,12 +1,23 @@
-from flask import Blueprint, flash, redirect, render_template, url_for
+import re
+
+from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
+from sqlalchemy.orm import joinedload
 
-from models import Event, Registration
+from backend.imports import bulk_register
+from models import db, Event, Registration, User
 
 
 registrations_bp = Blueprint("registrations", __name__)
 
 
+def _can_manage(event):
+    """Admins may manage any event's registrations, organizers only their own"""
+    if current_user.role == "superadmin":
+        return True
+    return current_user.role == "organizer" and event.created_by == current_user.id
+
+
 @registrations_bp.route("/event/<int:event_id>/registrations", endpoint="view_registrations")
 @login_required
 def view_registrations(event_id):
@@ -22,6 +33,60 @@ def view_registrations(event_id):
         flash("You can only view registrations for your own events", "danger")
         return redirect(url_for("organizer.organizer_dashboard"))
 
-    registrations = Registration.query.filter_by(event_id=event_id).all()
+    registrations = Registration.query.filter_by(event_id=event_id).options(
+        joinedload(Registration.student)
+    ).all()
 
     return render_template("registrations.html", event=event, registrations=registrations)
+
+
+@registrations_bp.route("/event/<int:event_id>/registrations/bulk", methods=["GET", "POST"],
+                        endpoint="bulk_registrations")
+@login_required
+def bulk_registrations(event_id):
+    """Register a class list, or copy/move another event's attendees, in one go"""
+    if current_user.role not in ["superadmin", "organizer"]:
+        flash("Access denied", "danger")
+        return redirect(url_for("public.index"))
+
+    event = Event.query.get_or_404(event_id)
+    if not _can_manage(event):
+        flash("You can only manage registrations for your own events", "danger")
+        return redirect(url_for("organizer.organizer_dashboard"))
+
+    source_events = Event.query.filter(Event.id != event_id)
+    if current_user.role == "organizer":
+        source_events = source_events.filter(Event.created_by == current_user.id)
+    source_events = source_events.order_by(Event.event_date.desc()).with_entities(Event.id, Event.title).all()
+
+    report = None
+    if request.method == "POST":
+        student_numbers = [n for n in re.split(r"[\s,;]+", request.form.get("student_numbers", "")) if n]
+        source_event_id = request.form.get("source_event_id", type=int)
+        move = bool(request.form.get("move"))
+
+        if source_event_id is not None:
+            source_event = db.session.get(Event, source_event_id)
+            if source_event is None or source_event.id == event_id or not _can_manage(source_event):
+                flash("Invalid source event", "danger")
+                return redirect(url_for("registrations.bulk_registrations", event_id=event_id))
+            if not student_numbers:
+                # No list given: take everyone registered for the source event
+                student_numbers = db.session.scalars(
+                    db.select(User.student_number)
+                    .join(Registration, Registration.student_id == User.id)
+                    .where(Registration.event_id == source_event_id)
+                    .order_by(Registration.id)
+                ).all()
+
+        if not student_numbers:
+            flash("Enter at least one student ID or choose a source event", "danger")
+            return redirect(url_for("registrations.bulk_registrations", event_id=event_id))
+
+        report = bulk_register(event_id, student_numbers, source_event_id=source_event_id, move=move)
+        flash(f"Registered {report.created} of {report.rows} students",
+              "success" if not report.errors else "warning")
+        db.session.refresh(event)
+
+    return render_template("bulk_registrations.html", event=event,
+                           source_events=source_events, report=report)
@@ -1,11 +1,15 @@
-import os
-
 from datetime import datetime
 from flask import Blueprint, current_app, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import case, exists, func
+from sqlalchemy.orm import joinedload, load_only
 
+from backend import jobs
 from backend.decorators import student_required
-from models import Event, Registration, Society
+from backend.invoices import process_invoice, store_invoice
+from backend.pagination import keyset_page
+from models import db, Event, EventFullError, Registration, Society
 
 
 student_bp = Blueprint("student", __name__)
@@ -15,7 +19,9 @@ student_bp = Blueprint("student", __name__)
 @student_required
 def student_dashboard():
     """Student dashboard with their registrations"""
-    my_registrations = Registration.query.filter_by(student_id=current_user.id).all()
+    my_registrations = Registration.query.filter_by(student_id=current_user.id).options(
+        joinedload(Registration.event)
+    ).all()
     return render_template("student/dashboard.html", registrations=my_registrations)
 
 
@@ -37,7 +43,7 @@ def register_event(event_id):
         flash("You are already registered for this event", "warning")
         return redirect(url_for("student.student_dashboard"))
 
-    # Check capacity
+    # Quick check for the common case; the seat itself is claimed on commit
     if event.is_full():
         flash("Sorry, this event is full", "danger")
         return redirect(url_for("public.index"))
@@ -62,20 +68,16 @@ def register_event(event_id):
             invoice_file = request.files["invoice"]
             if invoice_file.filename != "":
                 try:
-                    upload_folder = os.path.join(current_app.static_folder, "invoices")
-                    os.makedirs(upload_folder, exist_ok=True)
-                    filename = f"{current_user.id}_{event_id}_{invoice_file.filename}"
-                    file_path = os.path.join(upload_folder, filename)
-                    invoice_file.save(file_path)
-                    invoice_path = os.path.join("static", "invoices", filename).replace("\\", "/")
-                except Exception as e:
+                    # Stored once per distinct content; unreferenced blobs go in gc-invoices
+                    invoice_path = store_invoice(invoice_file)
+                except OSError as e:
                     flash(f"Error uploading invoice: {str(e)}", "danger")
                     return redirect(url_for("student.register_event", event_id=event_id))
             else:
                 flash("Invoice file is required for online payment", "danger")
                 return redirect(url_for("student.register_event", event_id=event_id))
 
-        # Create registration
+        # Create registration; the insert and the seat claim share one transaction
         registration = Registration(
             event_id=event_id,
             student_id=current_user.id,
@@ -83,10 +85,22 @@ def register_event(event_id):
             payment_method=payment_method,
             invoice_path=invoice_path,
         )
-        from models import db
-
         db.session.add(registration)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except EventFullError:
+            db.session.rollback()
+            flash("Sorry, this event is full", "danger")
+            return redirect(url_for("public.index"))
+        except IntegrityError:
+            # A concurrent request registered this student first
+            db.session.rollback()
+            flash("You are already registered for this event", "warning")
+            return redirect(url_for("student.student_dashboard"))
+
+        if invoice_path:
+            # Compression and thumbnails happen off the request thread
+            jobs.submit(process_invoice, invoice_path)
 
         flash(f'Successfully registered for "{event.title}"', "success")
         return redirect(url_for("student.student_dashboard"))
@@ -103,8 +117,6 @@ def unregister_event(event_id):
     ).first()
 
     if registration:
-        from models import db
-
         db.session.delete(registration)
         db.session.commit()
         flash("Successfully unregistered from event", "success")
@@ -112,52 +124,87 @@ def unregister_event(event_id):
     return redirect(url_for("student.student_dashboard"))
 
 
+# Columns the browse cards render, plus the fragment cache stamp
+EVENT_CARD_COLUMNS = (
+    Event.title, Event.description, Event.event_date, Event.location, Event.capacity,
+    Event.is_paid, Event.cost, Event.society_id, Event.registered_count,
+    Event.registrations_version, Event.updated_at,
+)
+
+
+def _upcoming_event_cards():
+    """Upcoming events loading only what an event card needs"""
+    return Event.query.options(
+        load_only(*EVENT_CARD_COLUMNS),
+        joinedload(Event.society).load_only(Society.name),
+    ).filter(Event.event_date >= datetime.utcnow())
+
+
 @student_bp.route("/student/events", endpoint="browse_events")
 @student_required
 def browse_events():
-    """Browse all available events"""
-    # Get all upcoming events that the student hasn't registered for yet
-    registered_event_ids = [r.event_id for r in 
-                         Registration.query.filter_by(student_id=current_user.id).all()]
-    
-    # Get upcoming events (excluding past events)
-    upcoming_events = Event.query.filter(
-        Event.event_date >= datetime.utcnow()
-    ).order_by(Event.event_date.asc()).all()
-    
-    # Separate events into registered and available
-    registered_events = [e for e in upcoming_events if e.id in registered_event_ids]
-    available_events = [e for e in upcoming_events if e.id not in registered_event_ids]
-    
+    """Browse upcoming events, split by an EXISTS on the student's registrations"""
+    page_size = current_app.config.get("EVENTS_PAGE_SIZE", 12)
+    registered = exists().where(
+        Registration.event_id == Event.id, Registration.student_id == current_user.id
+    )
+    sort_key = [Event.event_date, Event.id]
+
+    available = _upcoming_event_cards().filter(~registered)
+    try:
+        available_events, next_cursor = keyset_page(
+            available, sort_key, request.args.get("cursor"), page_size, descending=False
+        )
+    except ValueError:
+        available_events, next_cursor = keyset_page(available, sort_key, None, page_size, descending=False)
+    # Only the soonest page; the full list lives on the event history page
+    registered_events, more_registered = keyset_page(
+        _upcoming_event_cards().filter(registered), sort_key, None, page_size, descending=False,
+    )
+
     return render_template(
         "student/browse_events.html",
         available_events=available_events,
-        registered_events=registered_events
+        registered_events=registered_events,
+        next_cursor=next_cursor,
+        more_registered=more_registered is not None,
     )
 
 
 @student_bp.route("/student/event-history", endpoint="event_history")
 @student_required
 def event_history():
-    """Show student's event history including past events"""
-    # Get all registrations for this student
-    all_registrations = Registration.query.filter_by(student_id=current_user.id).all()
-    
-    # Separate into upcoming and past events
-    upcoming_registrations = []
-    past_registrations = []
-    
-    for reg in all_registrations:
-        if reg.event.event_date >= datetime.utcnow():
-            upcoming_registrations.append(reg)
-        else:
-            past_registrations.append(reg)
-    
-    # Sort past events by date (most recent first)
-    past_registrations.sort(key=lambda x: x.event.event_date, reverse=True)
-    
+    """Show student's event history; the split, ordering and totals are done in SQL"""
+    now = datetime.utcnow()
+    registered_events = Event.query.join(
+        Registration,
+        (Registration.event_id == Event.id) & (Registration.student_id == current_user.id),
+    )
+
+    # Counts and spend over every registration in one aggregate
+    past_count, total_spent = registered_events.with_entities(
+        func.count(case((Event.event_date < now, 1))),
+        func.coalesce(func.sum(case((Event.is_paid, Event.cost), else_=0)), 0),
+    ).one()
+
+    with_society = registered_events.options(joinedload(Event.society))
+    upcoming_events = with_society.filter(Event.event_date >= now).order_by(
+        Event.event_date.asc(), Event.id.asc()
+    ).all()
+
+    # Past events are paged newest first; long histories stay one page at a time
+    page_size = current_app.config.get("EVENTS_PAGE_SIZE", 12)
+    past = with_society.filter(Event.event_date < now)
+    try:
+        past_events, next_cursor = keyset_page(past, [Event.event_date, Event.id], request.args.get("cursor"), page_size)
+    except ValueError:
+        past_events, next_cursor = keyset_page(past, [Event.event_date, Event.id], None, page_size)
+
     return render_template(
         "student/event_history.html",
-        upcoming_registrations=upcoming_registrations,
-        past_registrations=past_registrations
+        upcoming_events=upcoming_events,
+        past_events=past_events,
+        past_count=past_count,
+        total_spent=total_spent,
+        next_cursor=next_cursor,
     )
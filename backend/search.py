@@ -0,0 +1,147 @@
+"""Full-text event search on an SQLite FTS5 index.
+
+``event_search`` holds one row per event (rowid = event.id) with its title,
+description, location and society name. Triggers on ``event`` and
+``society`` keep it in step with every write, ORM or Core, and only fire
+when an indexed column changes, so registration count updates never touch
+it. The index is created with the event table (``db.create_all()``) and by
+migration 5 for existing databases.
+
+Queries are split into words and every word is matched as a prefix, so
+"hack dub" finds "Hackathon in Dublin". Single characters only match whole
+words: as prefixes they match most of the catalogue. Results are ranked
+with BM25, weighting title matches above society, location and
+description.
+
+Without a date range only upcoming events are searched; past events are
+found by giving ``date_from`` / ``date_to``.
+
+Ranking cost grows with the number of matches, so a search with no
+filters beyond that default only ranks the ``SEARCH_CANDIDATES`` most
+recently created matching upcoming events: the index walks rowids newest
+first, skips past events and stops there. Only a word matching more than
+that many upcoming events can leave some out. Filtered searches rank every
+match so no older event that passes the filters is dropped.
+"""
+import re
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import DDL, bindparam, event as sa_event, text
+from sqlalchemy.orm import joinedload
+
+from models import db, Event
+
+FTS_TABLE = "event_search"
+# bm25() weights, in column order: title, description, location, society_name
+RANK_WEIGHTS = (10.0, 1.0, 2.0, 4.0)
+MAX_TERMS = 8
+SEARCH_CANDIDATES = 10000
+
+_SOCIETY_NAME = "COALESCE((SELECT name FROM society WHERE society.id = new.society_id), '')"
+
+SEARCH_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "title, description, location, society_name, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_event_insert AFTER INSERT ON event BEGIN "
+    f"INSERT INTO {FTS_TABLE} (rowid, title, description, location, society_name) "
+    f"VALUES (new.id, new.title, COALESCE(new.description, ''), new.location, {_SOCIETY_NAME}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_event_update "
+    "AFTER UPDATE OF title, description, location, society_id ON event BEGIN "
+    f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; "
+    f"INSERT INTO {FTS_TABLE} (rowid, title, description, location, society_name) "
+    f"VALUES (new.id, new.title, COALESCE(new.description, ''), new.location, {_SOCIETY_NAME}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_event_delete AFTER DELETE ON event BEGIN "
+    f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_society_rename AFTER UPDATE OF name ON society BEGIN "
+    f"UPDATE {FTS_TABLE} SET society_name = new.name "
+    "WHERE rowid IN (SELECT id FROM event WHERE society_id = new.id); END",
+]
+
+
+def install_search_index(connection):
+    """Create the FTS table and its triggers if missing"""
+    for statement in SEARCH_DDL:
+        connection.exec_driver_sql(statement)
+
+
+def rebuild_search_index(connection):
+    """Refill the index from the event and society tables; returns the row count"""
+    connection.exec_driver_sql(f"DELETE FROM {FTS_TABLE}")
+    connection.exec_driver_sql(
+        f"INSERT INTO {FTS_TABLE} (rowid, title, description, location, society_name) "
+        "SELECT event.id, event.title, COALESCE(event.description, ''), event.location, "
+        "COALESCE(society.name, '') FROM event LEFT JOIN society ON society.id = event.society_id"
+    )
+    connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return connection.exec_driver_sql(f"SELECT count(*) FROM {FTS_TABLE}").scalar()
+
+
+# create_all()/drop_all() manage the index together with the event table
+for _statement in SEARCH_DDL:
+    sa_event.listen(Event.__table__, "after_create", DDL(_statement))
+sa_event.listen(Event.__table__, "before_drop", DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+
+
+def match_expression(query_text):
+    """FTS5 MATCH expression for free text: every word, as a prefix, must match
+
+    Words are quoted so FTS5 operators and punctuation in user input are
+    taken literally. Returns None when there is nothing to search for.
+    """
+    words = re.findall(r"\w+", query_text or "")[:MAX_TERMS]
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' if len(word) > 1 else f'"{word}"' for word in words)
+
+
+def search_events(query_text="", date_from=None, date_to=None, society_id=None,
+                  price=None, max_cost=None, page=1, page_size=12):
+    """Return ``(events, has_more)`` for one page of search results
+
+    Text matches come best first; without text, matching events are listed
+    by date. date_from and date_to are inclusive dates; with neither, only
+    upcoming events match. price is "free" or "paid" and max_cost caps the
+    cost of paid events.
+    """
+    query = Event.query.options(joinedload(Event.society))
+    now = datetime.utcnow()
+    if not date_from and not date_to:
+        query = query.filter(Event.event_date >= now)
+    unfiltered = query
+    if date_from:
+        query = query.filter(Event.event_date >= datetime.combine(date_from, time.min))
+    if date_to:
+        query = query.filter(Event.event_date < datetime.combine(date_to + timedelta(days=1), time.min))
+    if society_id:
+        query = query.filter(Event.society_id == society_id)
+    if price == "free":
+        query = query.filter(Event.is_paid.is_not(True))
+    elif price == "paid":
+        query = query.filter(Event.is_paid.is_(True))
+    if max_cost is not None:
+        query = query.filter((Event.is_paid.is_not(True)) | (Event.cost <= max_cost))
+
+    match = match_expression(query_text)
+    if match:
+        rank = f"bm25({FTS_TABLE}, {', '.join(map(str, RANK_WEIGHTS))})"
+        if query is unfiltered:
+            # Cap the candidates after dropping past events, so older upcoming ones aren't lost
+            hits = text(
+                f"SELECT {FTS_TABLE}.rowid AS event_id, {rank} AS rank FROM {FTS_TABLE} "
+                f"JOIN event ON event.id = {FTS_TABLE}.rowid "
+                f"WHERE {FTS_TABLE} MATCH :match AND event.event_date >= :now "
+                f"ORDER BY {FTS_TABLE}.rowid DESC LIMIT {SEARCH_CANDIDATES}"
+            ).bindparams(bindparam("match", match), bindparam("now", now, type_=db.DateTime))
+        else:
+            hits = text(
+                f"SELECT rowid AS event_id, {rank} AS rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+            ).bindparams(match=match)
+        hits = hits.columns(event_id=db.Integer, rank=db.Float).subquery("hits")
+        query = query.join(hits, hits.c.event_id == Event.id).order_by(hits.c.rank, Event.event_date, Event.id)
+    else:
+        query = query.order_by(Event.event_date, Event.id)
+
+    page = max(page, 1)
+    events = query.offset((page - 1) * page_size).limit(page_size + 1).all()
+    return events[:page_size], len(events) > page_size
@@ -0,0 +1,138 @@
+"""Admin dashboard statistics.
+
+Headline figures come from one aggregate SELECT over the stored
+registration counts. The daily registration series and the recent-events
+list have different row shapes, so they stay as two small indexed queries
+next to it rather than being folded into the aggregate.
+
+The results are cached for ``DASHBOARD_STATS_TTL`` seconds and dropped when
+a session in this process commits a change the figures depend on: an
+inserted or deleted event, registration, user or society, or an edit to
+one of the event columns shown. Other writes (a login rehashing a
+password, say) leave the cache alone.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import case, event as sa_event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from backend.cache import TTLCache
+from models import db, Event, Registration, Society, User
+
+DashboardStats = namedtuple(
+    "DashboardStats",
+    "total_users total_societies total_events total_registrations total_capacity "
+    "paid_revenue fill_rate registrations_per_day recent_events computed_at",
+)
+
+
+class EventFill(namedtuple("EventFill", "id title event_date location registered_count capacity")):
+    __slots__ = ()
+
+    @property
+    def fill_rate(self):
+        return self.registered_count / self.capacity if self.capacity else 0.0
+
+
+_cache = TTLCache(maxsize=1)
+
+STATS_CHANGED_KEY = "dashboard_stats_changed"
+COUNTED_MODELS = (Event, Registration, User, Society)
+# Event columns the figures or the recent-events list read
+EVENT_STAT_COLUMNS = ("title", "event_date", "location", "capacity", "registered_count",
+                      "is_paid", "cost", "created_at")
+
+
+def compute_dashboard_stats(days=14, recent=5):
+    """Run the dashboard queries and return a DashboardStats"""
+    totals = db.session.execute(
+        select(
+            func.count(Event.id),
+            func.coalesce(func.sum(Event.registered_count), 0),
+            func.coalesce(func.sum(Event.capacity), 0),
+            func.coalesce(func.sum(case((Event.is_paid, Event.cost * Event.registered_count), else_=0)), 0),
+            select(func.count(User.id)).scalar_subquery(),
+            select(func.count(Society.id)).scalar_subquery(),
+        )
+    ).one()
+    events, registrations, capacity, revenue, users, societies = totals
+
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    day = func.date(Registration.registration_date)
+    per_day = {
+        str(row_day): count
+        for row_day, count in db.session.execute(
+            select(day, func.count(Registration.id))
+            .where(Registration.registration_date >= datetime.combine(since, datetime.min.time()))
+            .group_by(day)
+        )
+    }
+    registrations_per_day = [
+        (d, per_day.get(d.isoformat(), 0)) for d in (since + timedelta(days=i) for i in range(days))
+    ]
+
+    recent_events = [
+        EventFill(*row)
+        for row in db.session.execute(
+            select(Event.id, Event.title, Event.event_date, Event.location, Event.registered_count, Event.capacity)
+            .order_by(Event.created_at.desc())
+            .limit(recent)
+        )
+    ]
+
+    return DashboardStats(
+        total_users=users,
+        total_societies=societies,
+        total_events=events,
+        total_registrations=registrations,
+        total_capacity=capacity,
+        paid_revenue=float(revenue),
+        fill_rate=registrations / capacity if capacity else 0.0,
+        registrations_per_day=registrations_per_day,
+        recent_events=recent_events,
+        computed_at=datetime.utcnow(),
+    )
+
+
+def dashboard_stats():
+    """Cached DashboardStats for the admin dashboard"""
+    stats = _cache.get("dashboard")
+    if stats is None:
+        stats = compute_dashboard_stats(days=current_app.config.get("DASHBOARD_STATS_DAYS", 14))
+        _cache.set("dashboard", stats, ttl=current_app.config.get("DASHBOARD_STATS_TTL", 30))
+    return stats
+
+
+def invalidate_dashboard_stats():
+    """Drop cached figures, e.g. after Core writes the session can't see"""
+    _cache.clear()
+
+
+def _affects_stats(session):
+    if any(isinstance(obj, COUNTED_MODELS) for obj in list(session.new) + list(session.deleted)):
+        return True
+    for obj in session.dirty:
+        if isinstance(obj, Event):
+            attrs = inspect(obj).attrs
+            if any(attrs[name].history.has_changes() for name in EVENT_STAT_COLUMNS):
+                return True
+    return False
+
+
+@sa_event.listens_for(Session, "after_flush")
+def _collect_stats_changes(session, flush_context):
+    if _affects_stats(session):
+        session.info[STATS_CHANGED_KEY] = True
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop(STATS_CHANGED_KEY, False):
+        invalidate_dashboard_stats()
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _discard_stats_changes(session):
+    session.info.pop(STATS_CHANGED_KEY, None)
@@ -0,0 +1 @@
+"""Stand-alone performance benchmarks; run modules with ``python -m benchmarks.<name>``."""
@@ -0,0 +1,43 @@
+"""Measure peak Python memory and time-to-first-chunk of the streamed CSV export.
+
+Usage: python -m benchmarks.bench_csv_stream [sizes...]   (default: 10000 100000)
+"""
+import sys
+import time
+import tracemalloc
+
+from benchmarks.support import make_bench_app, print_table, seed_event_with_registrations
+from export_routes import iter_registrations_csv
+from models import db
+
+
+def run(size):
+    app = make_bench_app()
+    with app.app_context():
+        event_id = seed_event_with_registrations(size)
+        db.session.expunge_all()
+        tracemalloc.start()
+        started = time.perf_counter()
+        chunks = iter_registrations_csv(event_id)
+        next(chunks)
+        first_chunk = time.perf_counter() - started
+        total_bytes = sum(len(chunk) for chunk in chunks)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        db.engine.dispose()
+    return first_chunk, elapsed, total_bytes, peak
+
+
+def main(argv):
+    sizes = [int(arg) for arg in argv] or [10000, 100000]
+    table = []
+    for size in sizes:
+        first_chunk, elapsed, total_bytes, peak = run(size)
+        table.append((size, f"{first_chunk * 1000:.2f}", f"{elapsed:.3f}",
+                      f"{total_bytes / 1e6:.1f}", f"{peak / 1e6:.2f}"))
+    print_table(("registrations", "first chunk ms", "total s", "output MB", "peak MB"), table)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,54 @@
+"""Compare registration export cost before and after the joined report query.
+
+Usage: python -m benchmarks.bench_exports [sizes...]   (default: 1000 10000 100000)
+"""
+import sys
+
+from benchmarks.support import QueryCounter, make_bench_app, print_table, seed_event_with_registrations, timed
+from export_routes import format_report_row, registration_report_query
+from models import db, Registration, User
+
+
+def legacy_rows(event_id):
+    """Original export loop: one User lookup per registration"""
+    rows = []
+    for reg in Registration.query.filter_by(event_id=event_id).all():
+        student = db.session.get(User, reg.student_id)
+        rows.append(format_report_row((student.name, student.email, reg.phone_number,
+                                       reg.payment_method, reg.invoice_path, reg.registration_date)))
+    return rows
+
+
+def joined_rows(event_id):
+    """Current export path: a single joined SELECT returning tuples"""
+    return [format_report_row(row) for row in db.session.execute(registration_report_query(event_id))]
+
+
+def run(size):
+    app = make_bench_app()
+    with app.app_context():
+        event_id = seed_event_with_registrations(size)
+        results = {}
+        for label, build in (("before", legacy_rows), ("after", joined_rows)):
+            db.session.expunge_all()
+            with QueryCounter(db.engine) as counter, timed(results, label):
+                rows = build(event_id)
+            assert len(rows) == size
+            results[f"{label}_queries"] = counter.count
+        db.engine.dispose()
+    return results
+
+
+def main(argv):
+    sizes = [int(arg) for arg in argv] or [1000, 10000, 100000]
+    table = []
+    for size in sizes:
+        r = run(size)
+        table.append((size, r["before_queries"], f"{r['before']:.3f}",
+                      r["after_queries"], f"{r['after']:.3f}", f"{r['before'] / r['after']:.1f}x"))
+    print_table(("registrations", "queries before", "seconds before",
+                 "queries after", "seconds after", "speedup"), table)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
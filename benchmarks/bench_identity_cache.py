@@ -0,0 +1,63 @@
+"""Queries and latency per authenticated request with the identity cache off and on.
+
+Usage: python -m benchmarks.bench_identity_cache [requests]   (default: 2000)
+"""
+import os
+import sys
+import tempfile
+import time
+
+_handle, _path = tempfile.mkstemp(prefix="dbs-bench-", suffix=".db")
+os.close(_handle)
+os.environ["DATABASE_URL"] = f"sqlite:///{_path}"
+
+from backend.identity import configure_identity_cache  # noqa: E402
+from backend.main import app  # noqa: E402
+from benchmarks.support import QueryCounter, print_table  # noqa: E402
+from models import db, User  # noqa: E402
+
+ROUTES = ("/dashboard", "/student/dashboard")
+
+
+def run(ttl, requests):
+    app.config["IDENTITY_CACHE_TTL"] = ttl
+    configure_identity_cache(app)
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(student_id)
+        sess["_fresh"] = True
+
+    results = []
+    with app.app_context():
+        engine = db.engine
+    for route in ROUTES:
+        client.get(route)  # warm up (and fill the cache)
+        with QueryCounter(engine) as counter:
+            started = time.perf_counter()
+            for _ in range(requests):
+                client.get(route)
+            elapsed = time.perf_counter() - started
+        results.append((route, counter.count / requests, elapsed / requests * 1000))
+    return results
+
+
+def main(argv):
+    global student_id
+    requests = int(argv[0]) if argv else 2000
+    with app.app_context():
+        db.create_all()
+        student = User(student_number="S1", name="Bench Student", email="s@bench.ie", role="student",
+                       password_hash="unused")
+        db.session.add(student)
+        db.session.commit()
+        student_id = student.id
+
+    table = []
+    for label, ttl in (("uncached", 0), ("cached", 60)):
+        for route, queries, ms in run(ttl, requests):
+            table.append((label, route, f"{queries:.2f}", f"{ms:.3f}"))
+    print_table(("identity", "route", "queries/request", "ms/request"), table)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
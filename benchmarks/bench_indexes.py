@@ -0,0 +1,101 @@
+"""Query plans and latency of hot lookups without and with the migration-managed indexes.
+
+Seeds a synthetic catalogue, times each query with the indexes dropped,
+applies the index migration step, and times them again.
+
+Usage: python -m benchmarks.bench_indexes [events] [registrations]   (default: 100000 1000000)
+"""
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from backend.migrations import HOT_COLUMN_INDEXES, _add_hot_column_indexes
+from benchmarks.support import make_bench_app, print_table
+from models import db
+
+ORGANIZERS = 500
+STUDENTS = 50000
+
+QUERIES = {
+    "student registrations": ("SELECT * FROM registration WHERE student_id = ?", (ORGANIZERS + 123,)),
+    "public listing": ("SELECT * FROM event ORDER BY event_date DESC, id DESC LIMIT 13", ()),
+    "upcoming events": ("SELECT * FROM event WHERE event_date >= ? ORDER BY event_date LIMIT 12",
+                        (datetime(2031, 1, 1).isoformat(sep=" "),)),
+    "organizer listing": ("SELECT * FROM event WHERE created_by = ? ORDER BY event_date DESC", (42,)),
+    "events of society": ("SELECT count(*) FROM event WHERE society_id = ?", (42,)),
+    "society of head": ("SELECT * FROM society WHERE society_head_id = ?", (42,)),
+    "users by role": ("SELECT * FROM user WHERE role = ?", ("organizer",)),
+}
+
+
+def seed(connection, events, registrations, batch=50000):
+    now = datetime.utcnow().isoformat(sep=" ")
+    connection.exec_driver_sql(
+        "INSERT INTO user (id, student_number, email, password_hash, name, role, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(i, None, f"org{i}@bench.ie", "x", f"Organizer {i}", "organizer", now) for i in range(1, ORGANIZERS + 1)]
+        + [(ORGANIZERS + i, f"B{i:07d}", f"s{i}@bench.ie", "x", f"Student {i}", "student", now)
+           for i in range(1, STUDENTS + 1)],
+    )
+    connection.exec_driver_sql(
+        "INSERT INTO society (id, name, description, society_head_id, created_at) VALUES (?, ?, ?, ?, ?)",
+        [(i, f"Society {i}", "", i, now) for i in range(1, ORGANIZERS + 1)],
+    )
+    start = datetime(2025, 1, 1)
+    for lo in range(0, events, batch):
+        connection.exec_driver_sql(
+            "INSERT INTO event (id, title, description, event_date, location, capacity, is_paid, cost, "
+            "society_id, created_by, created_at, registered_count, registrations_version) "
+            "VALUES (?, ?, '', ?, 'Hall', 100, 0, 0, ?, ?, ?, 0, 0)",
+            [(i + 1, f"Event {i}", (start + timedelta(minutes=37 * i)).isoformat(sep=" "),
+              i % ORGANIZERS + 1, i % ORGANIZERS + 1, now) for i in range(lo, min(lo + batch, events))],
+        )
+    for lo in range(0, registrations, batch):
+        rows = []
+        for i in range(lo, min(lo + batch, registrations)):
+            student, round_ = i % STUDENTS, i // STUDENTS
+            rows.append(((student * 37 + round_ * 5003) % events + 1, ORGANIZERS + student + 1, now))
+        connection.exec_driver_sql(
+            "INSERT INTO registration (event_id, student_id, registration_date) VALUES (?, ?, ?)", rows
+        )
+
+
+def measure(connection, repeats=20):
+    results = {}
+    for label, (sql, params) in QUERIES.items():
+        plan = " | ".join(row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params))
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            connection.exec_driver_sql(sql, params).fetchall()
+            timings.append(time.perf_counter() - started)
+        results[label] = (plan, statistics.median(timings))
+    return results
+
+
+def main(argv):
+    events = int(argv[0]) if len(argv) > 0 else 100000
+    registrations = int(argv[1]) if len(argv) > 1 else 1000000
+    app = make_bench_app()
+    with app.app_context(), db.engine.begin() as connection:
+        for name, _, _ in HOT_COLUMN_INDEXES:
+            connection.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+        print(f"Seeding {events} events and {registrations} registrations...")
+        seed(connection, events, registrations)
+        connection.exec_driver_sql("ANALYZE")
+        before = measure(connection)
+        _add_hot_column_indexes(connection)
+        after = measure(connection)
+
+    for label in QUERIES:
+        print(f"{label}:\n  before: {before[label][0]}\n  after:  {after[label][0]}")
+    print()
+    print_table(("query", "ms before", "ms after", "speedup"), [
+        (label, f"{before[label][1] * 1000:.3f}", f"{after[label][1] * 1000:.3f}",
+         f"{before[label][1] / after[label][1]:.0f}x")
+        for label in QUERIES
+    ])
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,49 @@
+"""Logins per second per core for candidate PASSWORD_HASH_METHOD settings.
+
+Each login verifies one hash, so single-threaded verification throughput
+is the per-core login ceiling.
+
+Usage: python -m benchmarks.bench_password_hash [seconds] [methods...]
+"""
+import os
+import sys
+import time
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from benchmarks.support import print_table
+
+METHODS = (
+    "scrypt:16384:8:1",
+    "scrypt:32768:8:1",
+    "scrypt:65536:8:1",
+    "pbkdf2:sha256:100000",
+    "pbkdf2:sha256:260000",
+    "pbkdf2:sha256:600000",
+)
+
+
+def logins_per_second(method, seconds):
+    stored = generate_password_hash("correct horse battery staple", method=method)
+    done = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        check_password_hash(stored, "correct horse battery staple")
+        done += 1
+    elapsed = time.perf_counter() - started
+    return done / elapsed, elapsed / done
+
+
+def main(argv):
+    seconds = float(argv[0]) if argv else 2
+    methods = argv[1:] or METHODS
+    cores = os.cpu_count() or 1
+    table = []
+    for method in methods:
+        rate, latency = logins_per_second(method, seconds)
+        table.append((method, f"{latency * 1000:.1f}", f"{rate:.1f}", f"{rate * cores:.0f}"))
+    print_table(("method", "ms/login", "logins/s/core", f"logins/s x {cores} cores"), table)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
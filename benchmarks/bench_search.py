@@ -0,0 +1,110 @@
+"""Event search latency: FTS5 index versus LIKE scans over a large catalogue.
+
+Seeds a synthetic catalogue through the event table (the triggers fill the
+index), then times backend.search.search_events for typical queries next to
+the equivalent LIKE '%word%' filter. LIKE returns the first page by date
+without ranking, so it is only cheap while matches are common enough to
+fill a page early in the scan.
+
+Usage: python -m benchmarks.bench_search [events]   (default: 100000)
+"""
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import or_
+
+from backend.search import search_events  # registers the index DDL before create_all
+from benchmarks.support import make_bench_app, print_table
+from models import db, Event
+
+SOCIETIES = 200
+WORDS = ("workshop hackathon lecture meetup career fair networking python design startup finance "
+         "music film poetry debate chess football yoga photography robotics marketing law medicine "
+         "coffee pizza quiz karaoke volunteering alumni research seminar panel").split()
+# Filler vocabulary so topic words are common but not in every description
+FILLER = ["".join(random.Random(i).choices("abcdefghiklmnoprstuvwy", k=4 + i % 6)) for i in range(20000)]
+PLACES = ("Main Hall", "Library", "Café Lab", "Room 101", "Auditorium", "Sports Centre", "Student Union")
+
+QUERIES = {
+    "rare word": {"query_text": "robotics chess"},
+    "common prefix": {"query_text": "work"},
+    "short prefix": {"query_text": "ro"},
+    "single letter": {"query_text": "w"},
+    "two prefixes": {"query_text": "hack dub"},
+    "society name": {"query_text": "society 42"},
+    "word + filters": {"query_text": "python", "price": "free",
+                       "date_from": date(2026, 1, 1), "date_to": date(2026, 12, 31)},
+}
+
+
+def seed(connection, events, batch=20000):
+    rng = random.Random(42)
+    now = datetime.utcnow().isoformat(sep=" ")
+    connection.exec_driver_sql(
+        "INSERT INTO user (id, email, password_hash, name, role, created_at) VALUES (1, 'org@bench.ie', 'x', 'Org', 'organizer', ?)",
+        (now,),
+    )
+    connection.exec_driver_sql(
+        "INSERT INTO society (id, name, description, society_head_id, created_at) VALUES (?, ?, '', 1, ?)",
+        [(i, f"Society {i}", now) for i in range(1, SOCIETIES + 1)],
+    )
+    start = datetime(2025, 1, 1)
+    for lo in range(0, events, batch):
+        rows = []
+        for i in range(lo, min(lo + batch, events)):
+            title = " ".join(rng.sample(WORDS, 3)).title()
+            description = " ".join(rng.choices(FILLER, k=20) + rng.sample(WORDS, 2)) + (" in Dublin" if i % 50 == 0 else "")
+            paid = i % 3 == 0
+            rows.append((i + 1, title, description, (start + timedelta(minutes=17 * i)).isoformat(sep=" "),
+                         rng.choice(PLACES), int(paid), 10.0 if paid else 0.0, i % SOCIETIES + 1, now))
+        connection.exec_driver_sql(
+            "INSERT INTO event (id, title, description, event_date, location, capacity, is_paid, cost, "
+            "society_id, created_by, created_at, registered_count, registrations_version) "
+            "VALUES (?, ?, ?, ?, ?, 100, ?, ?, ?, 1, ?, 0, 0)",
+            rows,
+        )
+
+
+def like_scan(query_text, **_):
+    clauses = [
+        or_(Event.title.ilike(f"%{word}%"), Event.description.ilike(f"%{word}%"), Event.location.ilike(f"%{word}%"))
+        for word in query_text.split()
+    ]
+    return Event.query.filter(*clauses).order_by(Event.event_date).limit(13).all()
+
+
+def median_ms(function, kwargs, repeats=20):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function(**kwargs)
+        timings.append(time.perf_counter() - started)
+        db.session.expunge_all()
+    return statistics.median(timings) * 1000
+
+
+def main(argv):
+    events = int(argv[0]) if argv else 100000
+    app = make_bench_app()
+    with app.app_context():
+        print(f"Seeding {events} events...")
+        started = time.perf_counter()
+        with db.engine.begin() as connection:
+            seed(connection, events)
+            connection.exec_driver_sql("INSERT INTO event_search (event_search) VALUES ('optimize')")
+            connection.exec_driver_sql("ANALYZE")
+        print(f"  {time.perf_counter() - started:.1f}s including index maintenance\n")
+
+        table = []
+        for label, kwargs in QUERIES.items():
+            fts = median_ms(search_events, kwargs)
+            like = median_ms(like_scan, kwargs)
+            table.append((label, f"{fts:.2f}", f"{like:.2f}"))
+    print_table(("query", "ms fts5 ranked", "ms LIKE by date"), table)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
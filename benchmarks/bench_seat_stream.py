@@ -0,0 +1,68 @@
+"""Seat publisher fan-out to many idle listeners.
+
+Starts ``listeners`` threads blocked in SeatPublisher.wait() the way SSE
+responses are, publishes a burst of seat changes, and reports how long the
+publish call took and how long until every listener had the last message.
+The last publish touches every event, since a listener only returns from
+wait() for its own events.
+
+Usage: python -m benchmarks.bench_seat_stream [listeners] [messages]   (default: 2000 50)
+"""
+import statistics
+import sys
+import threading
+import time
+
+from backend.live import SeatPublisher
+from benchmarks.support import print_table
+
+
+def main(argv):
+    listeners = int(argv[0]) if argv else 2000
+    messages = int(argv[1]) if len(argv) > 1 else 50
+    publisher = SeatPublisher()
+    threading.stack_size(256 * 1024)
+
+    done = threading.Barrier(listeners + 1)
+    delays = []
+    delays_lock = threading.Lock()
+
+    events = 100
+    total = messages - 1 + events  # the last publish carries one message per event
+
+    def listen(event_ids):
+        position = publisher.position
+        while position < total:
+            position, _ = publisher.wait(position, event_ids, timeout=5)
+        finished = time.perf_counter()
+        with delays_lock:
+            delays.append(finished)
+        done.wait()
+
+    threads = [threading.Thread(target=listen, args=({i % events},), daemon=True) for i in range(listeners)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.5)  # let every listener block
+
+    publish_times = []
+    started = time.perf_counter()
+    for i in range(messages):
+        before = time.perf_counter()
+        if i == messages - 1:
+            publisher.publish([(event_id, i, 100) for event_id in range(events)])
+        else:
+            publisher.publish([(i % events, i, 100)])
+        publish_times.append(time.perf_counter() - before)
+    last_published = time.perf_counter()
+    done.wait()
+
+    print_table(("listeners", "messages", "publish median ms", "all delivered after ms", "p50 listener ms"), [(
+        listeners, messages,
+        f"{statistics.median(publish_times) * 1000:.3f}",
+        f"{(max(delays) - last_published) * 1000:.1f}",
+        f"{(statistics.median(delays) - started) * 1000:.1f}",
+    )])
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,95 @@
+"""Concurrent read/write throughput of the ``default`` vs ``tuned`` database profile.
+
+Reader threads render the public listing query while writer threads insert
+registrations (each taking a seat through the ORM hooks) for a fixed time.
+
+Usage: python -m benchmarks.bench_sqlite_profile [seconds] [readers] [writers]
+"""
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import joinedload
+
+from benchmarks.support import make_bench_app, print_table, seed_event_with_registrations
+from models import db, Event, Registration
+
+STUDENTS_PER_WRITER = 10000
+
+
+def run(profile, seconds, readers, writers):
+    app = make_bench_app(profile=profile)
+    with app.app_context():
+        seed_event_with_registrations(writers * STUDENTS_PER_WRITER)
+        organizer_id = db.session.query(Event.created_by).scalar()
+        for i in range(200):
+            db.session.add(Event(title=f"Listing {i}", event_date=datetime.utcnow() + timedelta(days=i),
+                                 location="Hall", capacity=10, created_by=organizer_id))
+        db.session.commit()
+        event_id = db.session.query(Event.id).filter_by(title="Bench Event").scalar()
+        first_student = db.session.query(Registration.student_id).order_by(Registration.student_id).first()[0]
+        # Free the seeded seats so writers can re-register the same students
+        db.session.query(Registration).delete()
+        db.session.query(Event).filter_by(id=event_id).update({"registered_count": 0})
+        db.session.commit()
+
+    stop = time.perf_counter() + seconds
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+
+    def reader():
+        done = 0
+        with app.app_context():
+            while time.perf_counter() < stop:
+                Event.query.options(joinedload(Event.society)).order_by(
+                    Event.event_date.desc(), Event.id.desc()).limit(12).all()
+                db.session.rollback()
+                done += 1
+        with lock:
+            counts["reads"] += done
+
+    def writer(offset):
+        done = locked = 0
+        student_id = first_student + offset * STUDENTS_PER_WRITER
+        with app.app_context():
+            while time.perf_counter() < stop:
+                db.session.add(Registration(event_id=event_id, student_id=student_id, phone_number="0870000000"))
+                try:
+                    db.session.commit()
+                    done += 1
+                    student_id += 1
+                except OperationalError:
+                    db.session.rollback()
+                    locked += 1
+        with lock:
+            counts["writes"] += done
+            counts["locked"] += locked
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with app.app_context():
+        db.engine.dispose()
+    return counts
+
+
+def main(argv):
+    seconds = float(argv[0]) if len(argv) > 0 else 5
+    readers = int(argv[1]) if len(argv) > 1 else 8
+    writers = int(argv[2]) if len(argv) > 2 else 4
+    table = []
+    for profile in ("default", "tuned"):
+        counts = run(profile, seconds, readers, writers)
+        table.append((profile, f"{counts['reads'] / seconds:.0f}", f"{counts['writes'] / seconds:.0f}",
+                      counts["locked"]))
+    print(f"{readers} readers, {writers} writers, {seconds:g}s per profile")
+    print_table(("profile", "reads/s", "writes/s", "'database is locked' errors"), table)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,71 @@
+"""Bulk student import throughput versus one-at-a-time creation.
+
+The one-at-a-time path mirrors admin_add_student: two uniqueness queries,
+one hash and one commit per student. The bulk path is backend.imports with
+hashing spread over a worker pool.
+
+Usage: python -m benchmarks.bench_student_import [rows] [method] [workers]
+       (default: 2000 scrypt:32768:8:1 <cpu count>)
+"""
+import os
+import sys
+import time
+
+from backend.hashing import init_password_hasher
+from backend.imports import import_students
+from benchmarks.support import make_bench_app, print_table
+from models import db, User
+
+
+def make_rows(count, prefix):
+    return [
+        (line, {"student_number": f"{prefix}{i:07d}", "name": f"Student {i}",
+                "email": f"{prefix.lower()}{i}@bench.ie", "password": f"pw-{i}"})
+        for line, i in enumerate(range(count), start=2)
+    ]
+
+
+def one_at_a_time(rows):
+    for _, row in rows:
+        if User.query.filter_by(email=row["email"]).first():
+            continue
+        if User.query.filter_by(student_number=row["student_number"]).first():
+            continue
+        student = User(student_number=row["student_number"], name=row["name"],
+                       email=row["email"], role="student")
+        student.set_password(row["password"])
+        db.session.add(student)
+        db.session.commit()
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 2000
+    method = argv[1] if len(argv) > 1 else "scrypt:32768:8:1"
+    workers = int(argv[2]) if len(argv) > 2 else os.cpu_count() or 1
+
+    app = make_bench_app()
+    app.config["PASSWORD_HASH_METHOD"] = method
+    app.config["PASSWORD_HASH_WORKERS"] = workers
+    hasher = init_password_hasher(app)
+
+    table = []
+    with app.app_context():
+        started = time.perf_counter()
+        one_at_a_time(make_rows(count, "A"))
+        serial = time.perf_counter() - started
+        table.append(("one at a time", f"{serial:.2f}", f"{count / serial:.0f}"))
+
+        hasher.hash_many(["warm"] * workers, method)  # start the pool outside the timing
+        started = time.perf_counter()
+        report = import_students(make_rows(count, "B"))
+        bulk = time.perf_counter() - started
+        assert report.created == count, report
+        table.append((f"bulk, {workers} hash workers", f"{bulk:.2f}", f"{count / bulk:.0f}"))
+    hasher.shutdown()
+
+    print(f"{count} students, {method}")
+    print_table(("path", "seconds", "rows/s"), table)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
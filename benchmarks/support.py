@@ -0,0 +1,107 @@
+"""Shared helpers for the benchmark scripts.
+
+Each benchmark runs against its own throwaway SQLite file so the development
+database is never touched.
+"""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import event as sa_event, insert
+from werkzeug.security import generate_password_hash
+
+from backend.database import init_database
+from models import db, User, Event, Registration
+
+
+def make_bench_app(uri=None, profile="tuned", engine_options=None):
+    """Create a bare Flask app bound to a fresh database file"""
+    if uri is None:
+        handle, path = tempfile.mkstemp(prefix="dbs-bench-", suffix=".db")
+        os.close(handle)
+        uri = f"sqlite:///{path}"
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = uri
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["DATABASE_PROFILE"] = profile
+    if engine_options:
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options
+    init_database(app, db)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def seed_event_with_registrations(count, batch=5000):
+    """Insert one event plus ``count`` students registered for it.
+
+    Uses Core bulk inserts (bypassing the ORM hooks) and sets the stored
+    registration count directly. Returns the event id.
+    """
+    password_hash = generate_password_hash("bench", method="pbkdf2:sha256:1")
+    organizer = User(name="Bench Organizer", email="organizer@bench.ie",
+                     password_hash=password_hash, role="organizer")
+    db.session.add(organizer)
+    db.session.flush()
+    event = Event(title="Bench Event", description="Benchmark event",
+                  event_date=datetime.utcnow() + timedelta(days=30),
+                  location="Bench Hall", capacity=count + 1,
+                  created_by=organizer.id, registered_count=count)
+    db.session.add(event)
+    db.session.commit()
+
+    now = datetime.utcnow()
+    first_id = organizer.id + 1
+    for start in range(0, count, batch):
+        stop = min(start + batch, count)
+        db.session.execute(insert(User), [
+            {"id": first_id + i, "student_number": f"B{i:07d}", "name": f"Student {i}",
+             "email": f"student{i}@bench.ie", "password_hash": password_hash,
+             "role": "student", "created_at": now}
+            for i in range(start, stop)
+        ])
+        db.session.execute(insert(Registration.__table__), [
+            {"event_id": event.id, "student_id": first_id + i, "registration_date": now,
+             "phone_number": "0871234567", "payment_method": "online",
+             "invoice_path": f"static/invoices/{i}.png"}
+            for i in range(start, stop)
+        ])
+        db.session.commit()
+    return event.id
+
+
+class QueryCounter:
+    """Count statements executed on an engine while active"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _before_cursor_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        sa_event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc):
+        sa_event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
+
+
+@contextmanager
+def timed(results, key):
+    """Store elapsed wall time in seconds under ``results[key]``"""
+    started = time.perf_counter()
+    yield
+    results[key] = time.perf_counter() - started
+
+
+def print_table(headers, rows):
+    """Print rows as a fixed-width text table"""
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).rjust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(c).rjust(w) for c, w in zip(row, widths)))
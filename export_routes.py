@@ -2,56 +2,99 @@
 Export functionality for registered students data
 Supports CSV and PDF formats
 """
-from flask import Response, make_response
-from models import Event, Registration, User
+from flask import Response, current_app, send_file, stream_with_context
+from models import db, Event, Registration, ReportJob, User
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.units import inch
-from io import BytesIO
+from io import BytesIO, StringIO
 import csv
-from datetime import datetime
+import hashlib
+import os
+from datetime import datetime, timedelta
+from uuid import uuid4
+from sqlalchemy import select
+
+from backend import jobs
+from backend.fragments import event_stamp
+
+CSV_HEADER = ['Student Name', 'Email', 'Phone Number', 'Payment Method', 'Invoice Path', 'Registration Date']
+CSV_CHUNK_ROWS = 1000
+
+
+def registration_report_query(event_id):
+    """Single joined SELECT of the columns the export reports need"""
+    return (
+        select(
+            User.name,
+            User.email,
+            Registration.phone_number,
+            Registration.payment_method,
+            Registration.invoice_path,
+            Registration.registration_date,
+        )
+        .join(User, User.id == Registration.student_id)
+        .where(Registration.event_id == event_id)
+        .order_by(Registration.id)
+    )
+
+
+def format_report_row(row):
+    """Turn a report tuple into display strings"""
+    name, email, phone, payment, invoice, registered_at = row
+    return [
+        name,
+        email,
+        phone or 'N/A',
+        payment or 'N/A',
+        invoice or 'N/A',
+        registered_at.strftime('%Y-%m-%d %H:%M'),
+    ]
+
+
+def _drain(buffer):
+    """Return everything written to buffer so far and reset it"""
+    chunk = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+    return chunk
+
+
+def iter_registrations_csv(event_id, chunk_rows=CSV_CHUNK_ROWS):
+    """Yield the CSV report in chunks of at most chunk_rows rows.
+
+    The header is yielded before the query runs, and rows are fetched
+    through a server-side cursor with yield_per, so memory stays flat
+    regardless of the number of registrations.
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    yield _drain(buffer)
+
+    query = registration_report_query(event_id).execution_options(yield_per=chunk_rows)
+    result = db.session.execute(query)
+    for partition in result.partitions():
+        writer.writerows(format_report_row(row) for row in partition)
+        yield _drain(buffer)
 
 
 def export_registrations_csv(event_id):
-    """Export event registrations as CSV"""
-    event = Event.query.get_or_404(event_id)
-    registrations = Registration.query.filter_by(event_id=event_id).all()
-    
-    # Create CSV in memory
-    output = []
-    output.append(['Student Name', 'Email', 'Phone Number', 'Payment Method', 'Invoice Path', 'Registration Date'])
-    
-    for reg in registrations:
-        student = User.query.get(reg.student_id)
-        output.append([
-            student.name,
-            student.email,
-            reg.phone_number or 'N/A',
-            reg.payment_method or 'N/A',
-            reg.invoice_path or 'N/A',
-            reg.registration_date.strftime('%Y-%m-%d %H:%M')
-        ])
-    
-    # Convert to CSV string
-    csv_output = []
-    for row in output:
-        csv_output.append(','.join([f'"{cell}"' for cell in row]))
-    
-    csv_string = '\n'.join(csv_output)
-    
-    # Create response
-    response = Response(csv_string, mimetype='text/csv')
+    """Export event registrations as a streamed CSV"""
+    Event.query.get_or_404(event_id)
+    
+    response = Response(stream_with_context(iter_registrations_csv(event_id)), mimetype='text/csv')
     response.headers['Content-Disposition'] = f'attachment; filename=event_{event_id}_registrations.csv'
     
     return response
 
 
-def export_registrations_pdf(event_id):
-    """Export event registrations as PDF"""
-    event = Event.query.get_or_404(event_id)
-    registrations = Registration.query.filter_by(event_id=event_id).all()
+def build_registrations_pdf(event, rows=None):
+    """Render the registrations report for event and return the PDF bytes"""
+    if rows is None:
+        rows = db.session.execute(registration_report_query(event.id)).all()
     
     # Create PDF in memory
     buffer = BytesIO()
@@ -74,7 +117,7 @@ def export_registrations_pdf(event_id):
     <b>Date:</b> {event.event_date.strftime('%Y-%m-%d %H:%M')}<br/>
     <b>Location:</b> {event.location}<br/>
     <b>Capacity:</b> {event.capacity}<br/>
-    <b>Registered:</b> {len(registrations)}<br/>
+    <b>Registered:</b> {len(rows)}<br/>
     <b>Report Generated:</b> {datetime.now().strftime('%Y-%m-%d %H:%M')}
     """
     elements.append(Paragraph(event_info, normal_style))
@@ -83,17 +126,8 @@ def export_registrations_pdf(event_id):
     # Table data
     data = [['#', 'Student Name', 'Email', 'Phone', 'Payment', 'Invoice', 'Registration Date']]
     
-    for idx, reg in enumerate(registrations, 1):
-        student = User.query.get(reg.student_id)
-        data.append([
-            str(idx),
-            student.name,
-            student.email,
-            reg.phone_number or 'N/A',
-            reg.payment_method or 'N/A',
-            reg.invoice_path or 'N/A',
-            reg.registration_date.strftime('%Y-%m-%d %H:%M')
-        ])
+    for idx, row in enumerate(rows, 1):
+        data.append([str(idx)] + format_report_row(row))
     
     # Create table
     table = Table(data, colWidths=[0.3*inch, 1.5*inch, 1.5*inch, 0.8*inch, 0.8*inch, 0.8*inch, 1.5*inch])
@@ -119,9 +153,119 @@ def export_registrations_pdf(event_id):
     pdf_data = buffer.getvalue()
     buffer.close()
     
-    # Create response
-    response = make_response(pdf_data)
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = f'attachment; filename=event_{event_id}_registrations.pdf'
+    return pdf_data
+
+
+def report_cache_dir():
+    """Directory holding finished PDF reports"""
+    return current_app.config.get('REPORT_CACHE_DIR') or os.path.join(current_app.instance_path, 'reports')
+
+
+def report_file_name(event, rows=None):
+    """Cache key covering everything the report prints
+
+    The event's stamp changes with any edit to the event row and with every
+    registration; the report rows add the students' current names and
+    emails, which can change without touching the event.
+    """
+    if rows is None:
+        rows = db.session.execute(registration_report_query(event.id)).all()
+    digest = hashlib.sha1(event_stamp(event).encode())
+    for row in rows:
+        digest.update(repr(tuple(row)).encode())
+    return f'event_{event.id}_{digest.hexdigest()[:16]}.pdf'
+
+
+def ensure_pdf_report(event):
+    """Return the cached PDF path for event, building it first if missing"""
+    cache_dir = report_cache_dir()
+    rows = db.session.execute(registration_report_query(event.id)).all()
+    path = os.path.join(cache_dir, report_file_name(event, rows))
+    if os.path.exists(path):
+        return path
+    
+    os.makedirs(cache_dir, exist_ok=True)
+    pdf_data = build_registrations_pdf(event, rows)
+    tmp_path = f'{path}.{uuid4().hex}.tmp'
+    with open(tmp_path, 'wb') as fh:
+        fh.write(pdf_data)
+    os.replace(tmp_path, path)
     
-    return response
+    # Older versions of this event's report can never be served again
+    prefix = f'event_{event.id}_'
+    for name in os.listdir(cache_dir):
+        if name.startswith(prefix) and name.endswith('.pdf') and name != os.path.basename(path):
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                pass
+    return path
+
+
+def export_registrations_pdf(event_id):
+    """Export event registrations as PDF, served from the report cache"""
+    event = Event.query.get_or_404(event_id)
+    path = ensure_pdf_report(event)
+    return send_file(
+        path,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=f'event_{event_id}_registrations.pdf',
+    )
+
+
+def enqueue_pdf_report(event, requested_by=None):
+    """Queue a background PDF build, reusing a pending or still-valid job
+
+    A job still queued or running after REPORT_JOB_TIMEOUT seconds was lost
+    to a restart or a crashed worker; it is marked failed and replaced.
+    """
+    version = event.registrations_version
+    job = ReportJob.query.filter(
+        ReportJob.event_id == event.id,
+        ReportJob.registrations_version == version,
+        ReportJob.status != 'failed',
+    ).order_by(ReportJob.created_at.desc()).first()
+    if job and job.status in ('queued', 'running'):
+        timeout = timedelta(seconds=current_app.config.get('REPORT_JOB_TIMEOUT', 600))
+        if job.created_at and job.created_at < datetime.utcnow() - timeout:
+            job.status = 'failed'
+            job.error = 'Abandoned: the worker stopped before finishing'
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            job = None
+    file_name = report_file_name(event)
+    if job and (job.status != 'done' or (
+            job.file_name == file_name and os.path.exists(os.path.join(report_cache_dir(), file_name)))):
+        return job
+    
+    job = ReportJob(id=uuid4().hex, event_id=event.id, registrations_version=version, requested_by=requested_by)
+    if os.path.exists(os.path.join(report_cache_dir(), file_name)):
+        job.status = 'done'
+        job.file_name = file_name
+        job.finished_at = datetime.utcnow()
+    db.session.add(job)
+    db.session.commit()
+    
+    if job.status == 'queued':
+        jobs.submit(run_pdf_report_job, job.id)
+    return job
+
+
+def run_pdf_report_job(job_id):
+    """Worker body: build the report for a queued job and record the outcome"""
+    job = db.session.get(ReportJob, job_id)
+    job.status = 'running'
+    db.session.commit()
+    
+    try:
+        event = db.session.get(Event, job.event_id)
+        job.file_name = os.path.basename(ensure_pdf_report(event))
+        job.status = 'done'
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(ReportJob, job_id)
+        job.status = 'failed'
+        job.error = str(e)
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
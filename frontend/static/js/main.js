@@ -57,16 +57,39 @@ document.addEventListener('DOMContentLoaded', function() {
 });
 
 // Event filtering functionality
+let activeEventFilter = 'all';
+
+function applyEventFilter() {
+    const eventCards = document.querySelectorAll('.event-card');
+    const visibleCountElement = document.getElementById('visible-events-count');
+    let visibleCount = 0;
+
+    eventCards.forEach(function(card) {
+        const priceType = card.getAttribute('data-price-type');
+
+        if (activeEventFilter === 'all' || priceType === activeEventFilter) {
+            card.style.display = 'block';
+            visibleCount++;
+        } else {
+            card.style.display = 'none';
+        }
+    });
+
+    // Update visible count
+    if (visibleCountElement) {
+        visibleCountElement.textContent = visibleCount;
+    }
+}
+
 document.addEventListener('DOMContentLoaded', function() {
     const filterButtons = document.querySelectorAll('.filter-btn');
     const eventCards = document.querySelectorAll('.event-card');
-    const visibleCountElement = document.getElementById('visible-events-count');
     
     if (filterButtons.length === 0 || eventCards.length === 0) return;
     
     filterButtons.forEach(function(button) {
         button.addEventListener('click', function() {
-            const filterType = this.getAttribute('data-filter');
+            activeEventFilter = this.getAttribute('data-filter');
             
             // Update button styles
             filterButtons.forEach(function(btn) {
@@ -77,23 +100,108 @@ document.addEventListener('DOMContentLoaded', function() {
             this.classList.remove('bg-gray-200', 'text-gray-700');
             this.classList.add('bg-blue-600', 'text-white');
             
-            // Filter events
-            let visibleCount = 0;
-            eventCards.forEach(function(card) {
-                const priceType = card.getAttribute('data-price-type');
+            applyEventFilter();
+        });
+    });
+});
+
+// "Load more" pagination: fetch the next page and append its cards in place
+document.addEventListener('DOMContentLoaded', function() {
+    const grid = document.getElementById('events-grid');
+    const loadMore = document.getElementById('load-more');
+    
+    if (!grid || !loadMore) return;
+    
+    loadMore.addEventListener('click', function(e) {
+        e.preventDefault();
+        loadMore.classList.add('opacity-50', 'pointer-events-none');
+        
+        fetch(loadMore.href, { credentials: 'same-origin' })
+            .then(function(response) { return response.text(); })
+            .then(function(html) {
+                const page = new DOMParser().parseFromString(html, 'text/html');
+                page.querySelectorAll('#events-grid .event-card').forEach(function(card) {
+                    grid.appendChild(document.importNode(card, true));
+                });
                 
-                if (filterType === 'all' || priceType === filterType) {
-                    card.style.display = 'block';
-                    visibleCount++;
+                const nextLink = page.getElementById('load-more');
+                if (nextLink) {
+                    loadMore.href = nextLink.getAttribute('href');
+                    loadMore.classList.remove('opacity-50', 'pointer-events-none');
                 } else {
-                    card.style.display = 'none';
+                    loadMore.parentNode.remove();
                 }
+                applyEventFilter();
+            })
+            .catch(function() {
+                // Fall back to a normal page navigation
+                window.location = loadMore.href;
             });
-            
-            // Update visible count
-            if (visibleCountElement) {
-                visibleCountElement.textContent = visibleCount;
-            }
+    });
+});
+
+// Live seat counts: listen to the server-sent seat stream for the events on
+// the page and update their counts, capacity bars and status badges in place
+function applySeatUpdate(seats) {
+    document.querySelectorAll('[data-seat-event="' + seats.id + '"]').forEach(function(card) {
+        card.querySelectorAll('[data-seat-ratio]').forEach(function(el) {
+            el.textContent = seats.registered + el.getAttribute('data-seat-ratio') + seats.capacity;
         });
+        card.querySelectorAll('[data-seat-available]').forEach(function(el) { el.textContent = seats.available; });
+        card.querySelectorAll('[data-seat-bar]').forEach(function(el) {
+            el.style.width = (seats.capacity ? Math.min(100, seats.registered / seats.capacity * 100) : 0) + '%';
+        });
+        card.querySelectorAll('[data-seat-status]').forEach(function(el) {
+            const full = seats.available === 0;
+            el.textContent = full ? 'Full' : 'Available';
+            el.classList.toggle('bg-red-100', full);
+            el.classList.toggle('text-red-700', full);
+            el.classList.toggle('bg-green-100', !full);
+            el.classList.toggle('text-green-700', !full);
+        });
+    });
+    // Register links may sit outside the card (per-user actions below cached cards)
+    document.querySelectorAll('[data-seat-register="' + seats.id + '"]').forEach(function(link) {
+        const full = seats.available === 0;
+        if (!link.hasAttribute('data-register-url')) {
+            link.setAttribute('data-register-url', link.getAttribute('href'));
+            link.setAttribute('data-register-label', link.textContent.trim());
+        }
+        if (full) {
+            link.removeAttribute('href');
+        } else {
+            link.setAttribute('href', link.getAttribute('data-register-url'));
+        }
+        link.setAttribute('aria-disabled', full ? 'true' : 'false');
+        link.textContent = full ? 'Event Full' : link.getAttribute('data-register-label');
+        link.classList.toggle('opacity-50', full);
+        link.classList.toggle('cursor-not-allowed', full);
+        link.classList.toggle('pointer-events-none', full);
     });
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    const container = document.querySelector('[data-seat-stream]');
+    if (!container || !window.EventSource) return;
+    
+    let source = null;
+    let subscribed = '';
+    
+    function connect() {
+        const ids = Array.from(document.querySelectorAll('[data-seat-event]'))
+            .map(function(card) { return card.getAttribute('data-seat-event'); })
+            .filter(function(id, index, all) { return all.indexOf(id) === index; })
+            .join(',');
+        if (!ids || ids === subscribed) return;
+        if (source) source.close();
+        subscribed = ids;
+        source = new EventSource(container.getAttribute('data-seat-stream') + '?events=' + ids);
+        source.addEventListener('seats', function(e) {
+            applySeatUpdate(JSON.parse(e.data));
+        });
+    }
+    
+    connect();
+    // "Load more" appends cards; resubscribe to include them
+    new MutationObserver(connect).observe(container, { childList: true });
 });
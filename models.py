@@ -1,13 +1,59 @@
 """
 Database models for DBS Event Management System
 """
+from flask import current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+from sqlalchemy import event as sa_event, func, select, update
 from datetime import datetime
 
 db = SQLAlchemy()
 
+# werkzeug's default; deployments override it with PASSWORD_HASH_METHOD
+DEFAULT_PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
+
+
+def normalize_hash_method(method):
+    """Spell out werkzeug's implicit defaults, e.g. 'pbkdf2' -> 'pbkdf2:sha256:600000'
+
+    Partial scrypt specs get werkzeug's r=8, p=1 ('scrypt:16384' ->
+    'scrypt:16384:8:1') so they compare equal to the prefix stored in the
+    hash. Raises ValueError for methods werkzeug can't produce.
+    """
+    name, *args = method.split(':')
+    try:
+        if name == 'scrypt' and len(args) <= 3:
+            if not args:
+                return DEFAULT_PASSWORD_HASH_METHOD
+            n, r, p = [int(value) for value in args] + [8, 1][len(args) - 1:]
+            return f'scrypt:{n}:{r}:{p}'
+        if name == 'pbkdf2' and len(args) <= 2:
+            hash_name = args[0] if args else 'sha256'
+            iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+            return f'pbkdf2:{hash_name}:{iterations}'
+    except ValueError:
+        pass
+    raise ValueError(f"Unsupported password hash method {method!r}")
+
+
+def password_hash_method():
+    """Hash algorithm and cost configured for this deployment"""
+    if has_app_context():
+        return normalize_hash_method(current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_PASSWORD_HASH_METHOD))
+    return DEFAULT_PASSWORD_HASH_METHOD
+
+
+def _password_hasher():
+    """The app's worker-pool hasher, or None to hash inline"""
+    if has_app_context():
+        return current_app.extensions.get('password_hasher')
+    return None
+
+
+class EventFullError(Exception):
+    """Raised when a registration would take an event past its capacity"""
+
 class User(UserMixin, db.Model):
     """User model for all three roles: superadmin, organizer, student"""
     id = db.Column(db.Integer, primary_key=True)
@@ -15,7 +61,7 @@ class User(UserMixin, db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(200), nullable=False)
     name = db.Column(db.String(100), nullable=False)
-    role = db.Column(db.String(20), nullable=False)  # superadmin, organizer, student
+    role = db.Column(db.String(20), nullable=False, index=True)  # superadmin, organizer, student
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -24,13 +70,29 @@ class User(UserMixin, db.Model):
     registrations = db.relationship('Registration', backref='student', lazy=True)
     
     def set_password(self, password):
-        """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        """Hash and set password with the configured method and cost"""
+        method = password_hash_method()
+        hasher = _password_hasher()
+        if hasher:
+            self.password_hash = hasher.hash(password, method)
+        else:
+            self.password_hash = generate_password_hash(password, method=method)
     
     def check_password(self, password):
         """Check if password matches hash"""
+        hasher = _password_hasher()
+        if hasher:
+            return hasher.verify(self.password_hash, password)
         return check_password_hash(self.password_hash, password)
     
+    def needs_rehash(self):
+        """True if the stored hash uses a different method or cost than configured"""
+        try:
+            stored_method = normalize_hash_method(self.password_hash.split('$', 1)[0])
+        except ValueError:
+            return True
+        return stored_method != password_hash_method()
+    
     def __repr__(self):
         return f'<User {self.email} - {self.role}>'
 
@@ -40,7 +102,7 @@ class Society(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
     description = db.Column(db.Text, nullable=True)
-    society_head_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    society_head_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -55,21 +117,33 @@ class Event(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=True)
-    event_date = db.Column(db.DateTime, nullable=False)
+    event_date = db.Column(db.DateTime, nullable=False, index=True)
     location = db.Column(db.String(200), nullable=False)
     capacity = db.Column(db.Integer, nullable=False)
     is_paid = db.Column(db.Boolean, default=False)
     cost = db.Column(db.Float, default=0.0)
-    society_id = db.Column(db.Integer, db.ForeignKey('society.id'), nullable=True)
+    society_id = db.Column(db.Integer, db.ForeignKey('society.id'), nullable=True, index=True)
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Denormalized COUNT(*) of registrations, kept in step by the Registration
+    # insert/delete hooks below so listings never load the relationship
+    registered_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Bumped on every registration insert/delete; keys cached registration reports
+    registrations_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Touched by every UPDATE of the row, including the Core count updates,
+    # so it changes whenever anything shown on an event card does
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     registrations = db.relationship('Registration', backref='event', lazy=True, cascade='all, delete-orphan')
     
+    # Organizer listings filter on created_by and sort by date; the composite
+    # index also serves plain created_by lookups
+    __table_args__ = (db.Index('ix_event_created_by_event_date', 'created_by', 'event_date'),)
+    
     def get_registered_count(self):
         """Get number of registered students"""
-        return len(self.registrations)
+        return self.registered_count or 0
     
     def available_slots(self):
         """Get number of available slots"""
@@ -79,6 +153,25 @@ class Event(db.Model):
         """Check if event is at capacity"""
         return self.get_registered_count() >= self.capacity
     
+    @classmethod
+    def reconcile_registered_counts(cls):
+        """Recompute registered_count from the registration table.
+
+        Returns the number of events whose stored count had drifted.
+        """
+        actual = (
+            select(func.count(Registration.id))
+            .where(Registration.event_id == cls.id)
+            .scalar_subquery()
+        )
+        result = db.session.execute(
+            update(cls)
+            .where(cls.registered_count != actual)
+            .values(registered_count=actual)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+    
     def __repr__(self):
         return f'<Event {self.title}>'
 
@@ -87,7 +180,7 @@ class Registration(db.Model):
     """Registration model - links students to events"""
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
-    student_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     registration_date = db.Column(db.DateTime, default=datetime.utcnow)
     phone_number = db.Column(db.String(20), nullable=True)
     payment_method = db.Column(db.String(20), nullable=True) # 'onsite' or 'online'
@@ -98,3 +191,79 @@ class Registration(db.Model):
     
     def __repr__(self):
         return f'<Registration Event:{self.event_id} Student:{self.student_id}>'
+
+
+class ReportJob(db.Model):
+    """Background PDF export job for an event's registrations"""
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    registrations_version = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    file_name = db.Column(db.String(255), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    requested_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<ReportJob {self.id} Event:{self.event_id} {self.status}>'
+
+
+# Aggregate counts for listing pages. Deferred so they are only computed
+# when a query opts in with undefer(), as one correlated subquery per row
+# of the same SELECT rather than a lazy relationship load per row.
+Society.event_count = db.column_property(
+    select(func.count(Event.id))
+    .where(Event.society_id == Society.id)
+    .correlate_except(Event)
+    .scalar_subquery(),
+    deferred=True,
+)
+
+User.society_count = db.column_property(
+    select(func.count(Society.id))
+    .where(Society.society_head_id == User.id)
+    .correlate_except(Society)
+    .scalar_subquery(),
+    deferred=True,
+)
+
+
+def _adjust_registered_count(connection, event_id, delta):
+    """Apply delta to an event's stored count inside the flushing transaction"""
+    event_table = Event.__table__
+    connection.execute(
+        update(event_table)
+        .where(event_table.c.id == event_id)
+        .values(
+            registered_count=event_table.c.registered_count + delta,
+            registrations_version=event_table.c.registrations_version + 1,
+        )
+    )
+
+
+@sa_event.listens_for(Registration, 'after_insert')
+def _registration_inserted(mapper, connection, target):
+    """Claim a seat for the new registration or abort the flush.
+
+    The capacity check and the increment are a single conditional UPDATE
+    issued after the INSERT, so the database write lock is already held and
+    concurrent registrations cannot both see the last free seat.
+    """
+    event_table = Event.__table__
+    result = connection.execute(
+        update(event_table)
+        .where(event_table.c.id == target.event_id)
+        .where(event_table.c.registered_count < event_table.c.capacity)
+        .values(
+            registered_count=event_table.c.registered_count + 1,
+            registrations_version=event_table.c.registrations_version + 1,
+        )
+    )
+    if result.rowcount == 0:
+        raise EventFullError(f'Event {target.event_id} is full')
+
+
+@sa_event.listens_for(Registration, 'after_delete')
+def _registration_deleted(mapper, connection, target):
+    _adjust_registered_count(connection, target.event_id, -1)
@@ -1,9 +1,13 @@
 import os
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from io import BytesIO
 
 import pytest
+from sqlalchemy import event as sa_event
 
+from backend.fragments import init_fragment_cache
+from backend.identity import configure_identity_cache
 from backend.main import app as flask_app
 from models import db, User, Society, Event, Registration
 
@@ -19,6 +23,7 @@ def app(tmp_path):
         SQLALCHEMY_DATABASE_URI=f"sqlite:///{test_db_path}",
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
         SECRET_KEY="test-secret",
+        REPORT_CACHE_DIR=str(tmp_path / "reports"),
     )
 
     # Isolate static folder so invoice uploads don't pollute repo
@@ -26,6 +31,10 @@ def app(tmp_path):
     invoices_dir = static_dir / "invoices"
     invoices_dir.mkdir(parents=True, exist_ok=True)
     flask_app.static_folder = str(static_dir)
+    
+    # Cached identities from a previous test's database must not leak in
+    configure_identity_cache(flask_app)
+    init_fragment_cache(flask_app)
 
     with flask_app.app_context():
         db.drop_all()
@@ -115,3 +124,32 @@ def login_student(client):
 @pytest.fixture()
 def sample_invoice_bytes():
     return BytesIO(b"fake-invoice-content")
+
+
+@pytest.fixture()
+def assert_max_queries(app):
+    """Context manager failing the test if its block runs more than ``limit`` SQL statements.
+
+    Guards listing pages against N+1 regressions: seed enough rows that a
+    per-row lazy load would blow the limit.
+    """
+    with app.app_context():
+        engine = db.engine
+
+    @contextmanager
+    def check(limit):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        sa_event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            sa_event.remove(engine, "before_cursor_execute", record)
+        assert len(statements) <= limit, (
+            f"{len(statements)} queries, expected at most {limit}:\n" + "\n".join(statements)
+        )
+
+    return check
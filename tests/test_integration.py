@@ -2,10 +2,15 @@
 Integration Tests for DBS Event Management System
 Tests core workflows: Student registration, Event creation, Registration system
 """
+import base64
+import csv
+import hashlib
+import os
+import time
 import pytest
 from datetime import datetime, timedelta
 from io import BytesIO
-from models import db, User, Society, Event, Registration
+from models import db, User, Society, Event, Registration, ReportJob
 
 
 class TestStudentRegistrationWorkflow:
@@ -294,3 +299,925 @@ class TestRoleBasedAccessWorkflow:
         for route in routes:
             resp = login_admin.get(route)
             assert resp.status_code in (200, 302)  # Either direct access or redirect
+
+
+class TestExportWorkflow:
+    """Test registration report exports"""
+    
+    def test_csv_and_pdf_export(self, login_organizer, app):
+        """Test organizer can export registrations for their event"""
+        with app.app_context():
+            event = Event.query.filter_by(is_paid=False).first()
+            student = User.query.filter_by(role="student").first()
+            db.session.add(Registration(event_id=event.id, student_id=student.id, phone_number="0871234567"))
+            db.session.commit()
+            event_id = event.id
+        
+        resp = login_organizer.get(f"/event/{event_id}/export/csv")
+        assert resp.status_code == 200
+        assert resp.mimetype == "text/csv"
+        body = resp.get_data(as_text=True)
+        assert "Student Name" in body
+        assert "student@dbs.ie" in body
+        assert "0871234567" in body
+        
+        resp = login_organizer.get(f"/event/{event_id}/export/pdf")
+        assert resp.status_code == 200
+        assert resp.headers["Content-Type"] == "application/pdf"
+        assert resp.data.startswith(b"%PDF")
+    
+    def test_csv_export_streams_and_quotes_fields(self, login_organizer, app):
+        """Test CSV export is streamed and survives embedded quotes and commas"""
+        with app.app_context():
+            event = Event.query.filter_by(is_paid=False).first()
+            student = User(student_number="S4242", name='Sam "The Man", Jr', email="sam@test.ie", role="student")
+            student.set_password("pass")
+            db.session.add(student)
+            db.session.commit()
+            db.session.add(Registration(event_id=event.id, student_id=student.id, phone_number="0871234567"))
+            db.session.commit()
+            event_id = event.id
+        
+        resp = login_organizer.get(f"/event/{event_id}/export/csv")
+        assert resp.status_code == 200
+        assert resp.is_streamed
+        rows = list(csv.reader(resp.get_data(as_text=True).splitlines()))
+        assert rows[0][0] == "Student Name"
+        assert rows[1][:3] == ['Sam "The Man", Jr', "sam@test.ie", "0871234567"]
+    
+    def test_pdf_rebuilt_after_event_or_student_edit(self, login_organizer, app):
+        """Test the cached report is reused only while everything it prints is unchanged"""
+        with app.app_context():
+            event = Event.query.filter_by(is_paid=False).first()
+            student = User.query.filter_by(role="student").first()
+            db.session.add(Registration(event_id=event.id, student_id=student.id, phone_number="0871234567"))
+            db.session.commit()
+            event_id, student_id = event.id, student.id
+        
+        first = login_organizer.get(f"/event/{event_id}/export/pdf").data
+        assert login_organizer.get(f"/event/{event_id}/export/pdf").data == first
+        
+        with app.app_context():
+            db.session.get(Event, event_id).title = "Renamed For Report"
+            db.session.commit()
+        renamed = login_organizer.get(f"/event/{event_id}/export/pdf").data
+        assert renamed != first
+        
+        with app.app_context():
+            db.session.get(User, student_id).name = "Renamed Student"
+            db.session.commit()
+        assert login_organizer.get(f"/event/{event_id}/export/pdf").data != renamed
+    
+    def test_background_pdf_export_job(self, login_organizer, app):
+        """Test queued PDF export can be polled, downloaded and reused from cache"""
+        with app.app_context():
+            event_id = Event.query.filter_by(is_paid=False).first().id
+        
+        resp = login_organizer.post(f"/event/{event_id}/export/pdf/jobs")
+        assert resp.status_code == 202
+        job = resp.get_json()
+        
+        deadline = time.time() + 10
+        while job["status"] in ("queued", "running") and time.time() < deadline:
+            time.sleep(0.05)
+            job = login_organizer.get(job["status_url"]).get_json()
+        assert job["status"] == "done"
+        
+        resp = login_organizer.get(job["download_url"])
+        assert resp.status_code == 200
+        assert resp.data.startswith(b"%PDF")
+        
+        # Unchanged registrations reuse the cached report
+        resp = login_organizer.post(f"/event/{event_id}/export/pdf/jobs")
+        assert resp.get_json()["status"] == "done"
+        
+        # A new registration invalidates it
+        with app.app_context():
+            student = User.query.filter_by(role="student").first()
+            db.session.add(Registration(event_id=event_id, student_id=student.id, phone_number="0871234567"))
+            db.session.commit()
+        resp = login_organizer.post(f"/event/{event_id}/export/pdf/jobs")
+        assert resp.get_json()["id"] != job["id"]
+    
+    def test_orphaned_export_job_is_replaced(self, login_organizer, app):
+        """Test a job left queued past REPORT_JOB_TIMEOUT is failed and re-enqueued"""
+        with app.app_context():
+            event = Event.query.filter_by(is_paid=False).first()
+            stale = ReportJob(id="stale", event_id=event.id, registrations_version=event.registrations_version,
+                              status="running", file_name="stale.pdf",
+                              created_at=datetime.utcnow() - timedelta(hours=1))
+            db.session.add(stale)
+            db.session.commit()
+            event_id = event.id
+        
+        resp = login_organizer.post(f"/event/{event_id}/export/pdf/jobs")
+        assert resp.get_json()["id"] != "stale"
+        with app.app_context():
+            assert db.session.get(ReportJob, "stale").status == "failed"
+    
+    def test_job_for_deleted_event_is_not_found(self, login_organizer, app):
+        """Test polling a job whose event was deleted returns 404 instead of failing"""
+        with app.app_context():
+            job = ReportJob(id="orphan", event_id=999999, registrations_version=0,
+                            status="done", file_name="orphan.pdf")
+            db.session.add(job)
+            db.session.commit()
+        
+        assert login_organizer.get("/export/jobs/orphan").status_code == 404
+        assert login_organizer.get("/export/jobs/orphan/download").status_code == 404
+    
+    def test_student_cannot_queue_export(self, login_student, app):
+        """Test students are refused background exports"""
+        with app.app_context():
+            event_id = Event.query.first().id
+        resp = login_student.post(f"/event/{event_id}/export/pdf/jobs")
+        assert resp.status_code == 403
+
+
+class TestPublicEventListing:
+    """Test keyset-paginated public event listing"""
+    
+    def test_json_listing_walks_every_event_once(self, client, app):
+        """Test following next_cursor visits all events newest first without repeats"""
+        with app.app_context():
+            organizer = User.query.filter_by(role="organizer").first()
+            same_day = datetime.utcnow() + timedelta(days=40)
+            for i in range(13):
+                # Several events share a date so the id tiebreak is exercised
+                db.session.add(Event(
+                    title=f"Listing Event {i}",
+                    event_date=same_day if i % 3 == 0 else same_day + timedelta(hours=i),
+                    location="Hall",
+                    capacity=10,
+                    created_by=organizer.id,
+                ))
+            db.session.commit()
+            expected = [e.id for e in Event.query.order_by(Event.event_date.desc(), Event.id.desc())]
+        
+        seen = []
+        url = "/events.json?limit=4"
+        while url:
+            resp = client.get(url)
+            assert resp.status_code == 200
+            data = resp.get_json()
+            assert len(data["events"]) <= 4
+            seen.extend(e["id"] for e in data["events"])
+            url = data["next_url"]
+        assert seen == expected
+    
+    def test_homepage_shows_load_more_cursor(self, client, app):
+        """Test homepage renders one page and links to the next"""
+        app.config["EVENTS_PAGE_SIZE"] = 1
+        try:
+            resp = client.get("/")
+            html = resp.get_data(as_text=True)
+            assert html.count('class="event-card') == 1
+            assert 'id="load-more"' in html
+            
+            assert client.get("/events.json?cursor=not-a-cursor").status_code == 400
+            assert client.get("/?cursor=not-a-cursor").status_code == 200
+        finally:
+            app.config["EVENTS_PAGE_SIZE"] = 12
+
+
+class TestListingQueryCounts:
+    """Test listing pages load related rows in bulk rather than per row"""
+    
+    ROWS = 8
+    
+    @pytest.fixture()
+    def populated(self, app):
+        """Several organizers, societies, events and registrations"""
+        with app.app_context():
+            student = User.query.filter_by(role="student").first()
+            for i in range(self.ROWS):
+                organizer = User(name=f"Head {i}", email=f"head{i}@test.ie", role="organizer")
+                organizer.password_hash = "unused"
+                db.session.add(organizer)
+                db.session.flush()
+                society = Society(name=f"Society {i}", society_head_id=organizer.id)
+                db.session.add(society)
+                db.session.flush()
+                event = Event(
+                    title=f"Event {i}",
+                    description="Listing event",
+                    event_date=datetime.utcnow() + timedelta(days=i + 1),
+                    location="Hall",
+                    capacity=10,
+                    society_id=society.id,
+                    created_by=organizer.id,
+                )
+                db.session.add(event)
+                db.session.flush()
+                db.session.add(Registration(event_id=event.id, student_id=student.id, phone_number="0870000000"))
+            db.session.commit()
+            return Event.query.filter_by(title="Event 0").first().id
+    
+    def test_admin_listings(self, login_admin, populated, assert_max_queries):
+        """Test admin societies, organizers and events pages"""
+        for route in ("/admin/societies", "/admin/organizers", "/admin/events", "/admin/dashboard"):
+            with assert_max_queries(6):
+                assert login_admin.get(route).status_code == 200
+        with assert_max_queries(6):
+            assert login_admin.get(f"/event/{populated}/registrations").status_code == 200
+    
+    def test_student_listings(self, login_student, populated, assert_max_queries):
+        """Test student dashboard, browse and history pages"""
+        for route in ("/student/dashboard", "/student/events", "/student/event-history"):
+            with assert_max_queries(3):
+                assert login_student.get(route).status_code == 200
+    
+    def test_public_listing(self, client, populated, assert_max_queries):
+        """Test anonymous homepage"""
+        with assert_max_queries(2):
+            assert client.get("/").status_code == 200
+
+
+class TestSqlInstrumentation:
+    """Test opt-in per-request SQL instrumentation"""
+    
+    def test_server_timing_and_slow_query_log(self, client, app, tmp_path):
+        """Test enabled instrumentation reports timings and logs slow statements"""
+        instrumentation = app.extensions["sql_instrumentation"]
+        assert "Server-Timing" not in client.get("/").headers
+        
+        log_path = tmp_path / "slow.log"
+        app.config.update(SLOW_QUERY_LOG=str(log_path), SLOW_QUERY_THRESHOLD_MS=0)
+        instrumentation.enable()
+        try:
+            resp = client.get("/")
+        finally:
+            instrumentation.disable()
+        
+        assert resp.headers["Server-Timing"].startswith("db;dur=")
+        assert "queries" in resp.headers["Server-Timing"]
+        log = log_path.read_text()
+        assert "endpoint=public.index" in log
+        assert "queries endpoint=public.index slowest: " in log
+        assert "Server-Timing" not in client.get("/").headers
+    
+    def test_failed_statement_does_not_leak_start_time(self, app, tmp_path):
+        """Test a statement that raises leaves no pending start time on the connection"""
+        instrumentation = app.extensions["sql_instrumentation"]
+        app.config.update(SLOW_QUERY_LOG=str(tmp_path / "slow.log"))
+        instrumentation.enable()
+        try:
+            with app.app_context(), db.engine.connect() as connection:
+                with pytest.raises(Exception):
+                    connection.exec_driver_sql("SELECT * FROM no_such_table")
+                assert connection.info.get("query_start") == []
+        finally:
+            instrumentation.disable()
+
+
+class TestBulkStudentImport:
+    """Test bulk student import from the admin page and the CLI"""
+    
+    def test_admin_upload_not_utf8_is_reported(self, login_admin, app):
+        """Test a cp1252 CSV (Excel export) is refused with a message instead of a 500"""
+        upload = "student_number,name,email,password\nC0001,Ren\u00e9e Caf\u00e9,cp@dbs.ie,pass1\n".encode("cp1252")
+        resp = login_admin.post("/admin/import-students", data={
+            "file": (BytesIO(upload), "students.csv")
+        }, content_type="multipart/form-data")
+        
+        assert resp.status_code == 200
+        assert "File must be UTF-8 CSV" in resp.get_data(as_text=True)
+        with app.app_context():
+            assert User.query.filter_by(email="cp@dbs.ie").first() is None
+    
+    def test_admin_upload_over_row_limit_is_refused(self, login_admin, app):
+        """Test oversized uploads are rejected before any hashing, pointing at the CLI"""
+        app.config["STUDENT_IMPORT_MAX_ROWS"] = 2
+        try:
+            upload = "student_number,name,email,password\n" + "".join(
+                f"L{i},Limit {i},limit{i}@dbs.ie,pass{i}\n" for i in range(3)
+            )
+            resp = login_admin.post("/admin/import-students", data={
+                "file": (BytesIO(upload.encode()), "students.csv")
+            }, content_type="multipart/form-data")
+        finally:
+            app.config["STUDENT_IMPORT_MAX_ROWS"] = 500
+        
+        assert "uploads are limited to 2" in resp.get_data(as_text=True)
+        with app.app_context():
+            assert User.query.filter(User.email.like("limit%")).count() == 0
+    
+    def test_admin_csv_upload_reports_bad_rows(self, login_admin, app):
+        """Test valid rows are created and every rejected row is reported"""
+        upload = (
+            "student_number,name,email,password\n"
+            "B0001,Bulk One,bulk1@dbs.ie,pass1\n"
+            "B0002,Bulk Two,student@dbs.ie,pass2\n"
+            "S0001,Bulk Three,bulk3@dbs.ie,pass3\n"
+            "B0004,Bulk Four,bulk1@dbs.ie,pass4\n"
+            "B0005,Bulk Five,bulk5@dbs.ie,\n"
+            "B0006,Bulk Six,bulk6@dbs.ie,pass6\n"
+        )
+        resp = login_admin.post("/admin/import-students", data={
+            "file": (BytesIO(upload.encode()), "students.csv")
+        }, content_type="multipart/form-data")
+        
+        assert resp.status_code == 200
+        page = resp.get_data(as_text=True)
+        assert "2 of 6 rows imported" in page
+        assert "Email already exists" in page
+        assert "Student ID already exists" in page
+        assert "Duplicate email in file" in page
+        assert "Missing password" in page
+        
+        with app.app_context():
+            imported = User.query.filter(User.email.in_(["bulk1@dbs.ie", "bulk6@dbs.ie"])).all()
+            assert {u.student_number for u in imported} == {"B0001", "B0006"}
+            assert all(u.role == "student" for u in imported)
+            assert imported[0].check_password("pass1" if imported[0].email == "bulk1@dbs.ie" else "pass6")
+    
+    def test_cli_json_import(self, app, tmp_path):
+        """Test flask import-students with a JSON file"""
+        path = tmp_path / "students.json"
+        path.write_text(
+            '{"students": [{"student_number": "J0001", "name": "Json One", '
+            '"email": "json1@dbs.ie", "password": "pw"}, {"name": "No Email"}]}'
+        )
+        result = app.test_cli_runner().invoke(args=["import-students", str(path)])
+        
+        assert "line 2: Missing student_number, email, password" in result.output
+        assert "Imported 1 of 2 student(s), 1 rejected" in result.output
+        with app.app_context():
+            assert User.query.filter_by(student_number="J0001").count() == 1
+
+
+class TestBulkRegistration:
+    """Test set-wise bulk registration and transfers between events"""
+    
+    @pytest.fixture()
+    def cohort(self, app):
+        """Six extra students; the fixture student is already on the free event"""
+        with app.app_context():
+            student = User.query.filter_by(student_number="S0001").first()
+            free_event = Event.query.filter_by(title="Free Event").first()
+            db.session.add(Registration(event_id=free_event.id, student_id=student.id))
+            db.session.add_all([
+                User(student_number=f"C{i}", name=f"Cohort {i}", email=f"cohort{i}@dbs.ie",
+                     password_hash="x", role="student")
+                for i in range(1, 7)
+            ])
+            db.session.commit()
+            paid_event = Event.query.filter_by(title="Paid Event").first()
+            return free_event.id, paid_event.id
+    
+    def test_class_list_enforces_capacity_and_uniqueness(self, login_organizer, app, cohort, assert_max_queries):
+        """Test one submission accepts what fits and explains every rejection"""
+        free_id, _ = cohort
+        numbers = "S0001\nC1, C2\nC3;C4\nC5\nC6\nC1\nNOPE"
+        with assert_max_queries(14):
+            resp = login_organizer.post(f"/event/{free_id}/registrations/bulk",
+                                        data={"student_numbers": numbers})
+        
+        assert resp.status_code == 200
+        page = resp.get_data(as_text=True)
+        assert "4 of 9 students registered" in page
+        assert "Accepted: C1, C2, C3, C4" in page
+        for reason in ("Already registered", "Event is full", "Listed more than once", "Unknown student ID"):
+            assert reason in page
+        
+        with app.app_context():
+            event = db.session.get(Event, free_id)
+            assert event.registered_count == event.capacity == 5
+            assert Registration.query.filter_by(event_id=free_id).count() == 5
+    
+    def test_move_cohort_between_events(self, login_organizer, app, cohort):
+        """Test moving every attendee of one event to another"""
+        free_id, paid_id = cohort
+        login_organizer.post(f"/event/{free_id}/registrations/bulk", data={"student_numbers": "C1 C2"})
+        
+        resp = login_organizer.post(f"/event/{paid_id}/registrations/bulk", data={
+            "student_numbers": "",
+            "source_event_id": free_id,
+            "move": "1",
+        })
+        assert "3 of 3 students registered" in resp.get_data(as_text=True)
+        
+        with app.app_context():
+            free_event = db.session.get(Event, free_id)
+            paid_event = db.session.get(Event, paid_id)
+            assert free_event.registered_count == 0
+            assert Registration.query.filter_by(event_id=free_id).count() == 0
+            assert paid_event.registered_count == 3
+            assert Registration.query.filter_by(event_id=paid_id).count() == 3
+    
+    def test_student_cannot_bulk_register(self, login_student, cohort):
+        """Test students are turned away"""
+        free_id, _ = cohort
+        resp = login_student.post(f"/event/{free_id}/registrations/bulk", data={"student_numbers": "C1"})
+        assert resp.status_code == 302
+
+
+class TestInvoiceStorage:
+    """Test content-addressed invoice storage and garbage collection"""
+    
+    def test_identical_uploads_share_one_blob(self, app):
+        """Test two students uploading the same file store it once"""
+        with app.app_context():
+            other = User(student_number="S0002", name="Other", email="other@dbs.ie", role="student")
+            other.set_password("other123")
+            db.session.add(other)
+            db.session.commit()
+            event_id = Event.query.filter_by(is_paid=True).first().id
+        
+        paths = []
+        for email, password in (("student@dbs.ie", "student123"), ("other@dbs.ie", "other123")):
+            client = app.test_client()
+            client.post("/login", data={"email": email, "password": password})
+            client.post(f"/event/{event_id}/register", data={
+                "phone_number": "0871234567",
+                "payment_method": "online",
+                "invoice": (BytesIO(b"same receipt bytes"), f"{email}.PNG")
+            }, content_type="multipart/form-data")
+            with app.app_context():
+                paths.append(Registration.query.filter_by(event_id=event_id).order_by(Registration.id.desc()).first().invoice_path)
+        
+        assert paths[0] == paths[1]
+        relpath = paths[0].replace("static/invoices/", "")
+        shard_a, shard_b, name = relpath.split("/")
+        assert name.startswith(shard_a + shard_b) and name.endswith(".png")
+        
+        store = os.path.join(app.static_folder, "invoices")
+        blobs = [f for _, _, files in os.walk(store) for f in files]
+        assert blobs == [name]
+        
+        resp = app.test_client().get(f"/invoices/{relpath}")
+        assert resp.data == b"same receipt bytes"
+    
+    def test_gc_removes_only_unreferenced_blobs(self, login_student, app):
+        """Test flask gc-invoices after a student unregisters"""
+        with app.app_context():
+            event_id = Event.query.filter_by(is_paid=True).first().id
+        login_student.post(f"/event/{event_id}/register", data={
+            "phone_number": "0871234567",
+            "payment_method": "online",
+            "invoice": (BytesIO(b"receipt"), "receipt.pdf")
+        }, content_type="multipart/form-data")
+        runner = app.test_cli_runner()
+        
+        result = runner.invoke(args=["gc-invoices", "--grace", "0"])
+        assert "Removed 0 unreferenced invoice(s)" in result.output
+        
+        login_student.get(f"/event/{event_id}/unregister")
+        result = runner.invoke(args=["gc-invoices", "--grace", "0", "--dry-run"])
+        assert "Would remove 1 unreferenced invoice(s)" in result.output
+        result = runner.invoke(args=["gc-invoices", "--grace", "0"])
+        assert "Removed 1 unreferenced invoice(s)" in result.output
+        assert not [f for _, _, files in os.walk(os.path.join(app.static_folder, "invoices")) for f in files]
+    
+    def test_image_invoice_compressed_with_thumbnail(self, login_student, app):
+        """Test image uploads are re-encoded and thumbnailed in the background"""
+        Image = pytest.importorskip("PIL.Image")
+        
+        upload = BytesIO()
+        Image.effect_noise((2400, 1600), 64).convert("RGB").save(upload, format="PNG")
+        original_size = upload.tell()
+        upload.seek(0)
+        with app.app_context():
+            event_id = Event.query.filter_by(is_paid=True).first().id
+        login_student.post(f"/event/{event_id}/register", data={
+            "phone_number": "0871234567",
+            "payment_method": "online",
+            "invoice": (upload, "screenshot.png")
+        }, content_type="multipart/form-data")
+        
+        with app.app_context():
+            relpath = Registration.query.filter_by(event_id=event_id).first().invoice_path.replace("static/invoices/", "")
+        thumb_path = os.path.join(app.static_folder, "invoices", relpath.replace(".png", ".thumb.webp"))
+        deadline = time.time() + 10
+        while not os.path.exists(thumb_path) and time.time() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.2)  # let the job finish dropping the original
+        
+        thumb = login_student.get(f"/invoices/{relpath}?size=thumb")
+        assert thumb.mimetype == "image/webp"
+        assert max(Image.open(BytesIO(thumb.data)).size) <= 160
+        full = login_student.get(f"/invoices/{relpath}")
+        assert full.mimetype == "image/webp"
+        assert max(Image.open(BytesIO(full.data)).size) <= 2000
+        assert len(full.data) < original_size
+        assert not os.path.exists(os.path.join(app.static_folder, "invoices", relpath))
+        
+        runner = app.test_cli_runner()
+        assert "Removed 0" in runner.invoke(args=["gc-invoices", "--grace", "0"]).output
+        login_student.get(f"/event/{event_id}/unregister")
+        assert "Removed 2" in runner.invoke(args=["gc-invoices", "--grace", "0"]).output
+
+
+class TestInvoiceServing:
+    """Test ETag, conditional, range and sendfile handling for invoices"""
+    
+    @pytest.fixture()
+    def pdf_invoice(self, login_student, app):
+        with app.app_context():
+            event_id = Event.query.filter_by(is_paid=True).first().id
+        login_student.post(f"/event/{event_id}/register", data={
+            "phone_number": "0871234567",
+            "payment_method": "online",
+            "invoice": (BytesIO(b"%PDF-1.4 receipt body"), "receipt.pdf")
+        }, content_type="multipart/form-data")
+        with app.app_context():
+            path = Registration.query.filter_by(event_id=event_id).first().invoice_path
+        return path.replace("static/invoices/", "")
+    
+    def test_strong_etag_conditional_and_range(self, client, pdf_invoice):
+        """Test digest ETag, 304 revalidation, byte ranges and private caching"""
+        digest = pdf_invoice.rsplit("/", 1)[-1].split(".")[0]
+        resp = client.get(f"/invoices/{pdf_invoice}")
+        assert resp.status_code == 200
+        assert resp.headers["ETag"] == f'"{digest}"'
+        assert "private" in resp.headers["Cache-Control"]
+        assert "immutable" in resp.headers["Cache-Control"]
+        assert "public" not in resp.headers["Cache-Control"]
+        
+        resp = client.get(f"/invoices/{pdf_invoice}", headers={"If-None-Match": f'"{digest}"'})
+        assert resp.status_code == 304
+        assert resp.data == b""
+        
+        resp = client.get(f"/invoices/{pdf_invoice}", headers={"Range": "bytes=0-3"})
+        assert resp.status_code == 206
+        assert resp.data == b"%PDF"
+        assert resp.headers["Content-Range"] == "bytes 0-3/21"
+    
+    def test_legacy_file_etag_hashes_content(self, client, app):
+        """Test flat legacy uploads get a content ETag and must revalidate"""
+        with open(os.path.join(app.static_folder, "invoices", "1_1_old.png"), "wb") as f:
+            f.write(b"legacy bytes")
+        resp = client.get("/invoices/1_1_old.png")
+        assert resp.headers["ETag"] == f'"{hashlib.sha256(b"legacy bytes").hexdigest()}"'
+        assert "no-cache" in resp.headers["Cache-Control"]
+        assert client.get("/invoices/missing.png").status_code == 404
+        assert client.get("/invoices/../../etc/passwd").status_code == 404
+    
+    def test_sendfile_modes(self, client, app, pdf_invoice):
+        """Test the front server is told which file to stream"""
+        try:
+            app.config["INVOICE_SENDFILE"] = "x-accel-redirect"
+            resp = client.get(f"/invoices/{pdf_invoice}")
+            assert resp.headers["X-Accel-Redirect"] == f"/protected-invoices/{pdf_invoice}"
+            assert resp.data == b""
+            etag = resp.headers["ETag"]
+            resp = client.get(f"/invoices/{pdf_invoice}", headers={"If-None-Match": etag})
+            assert resp.status_code == 304
+            assert "X-Accel-Redirect" not in resp.headers
+            
+            app.config["INVOICE_SENDFILE"] = "x-sendfile"
+            resp = client.get(f"/invoices/{pdf_invoice}")
+            assert resp.headers["X-Sendfile"].endswith(pdf_invoice)
+            assert resp.data == b""
+        finally:
+            app.config["INVOICE_SENDFILE"] = None
+
+
+class TestBrowseEvents:
+    """Test the student browse page splits and pages events in the database"""
+    
+    def test_split_and_pagination(self, login_student, app, assert_max_queries):
+        """Test registered events are excluded from available pages, which follow date order"""
+        with app.app_context():
+            organizer = User.query.filter_by(role="organizer").first()
+            student = User.query.filter_by(role="student").first()
+            events = [
+                Event(title=f"Browse {i:02d}", description="", event_date=datetime.utcnow() + timedelta(days=10 + i),
+                      location="Hall", capacity=10, created_by=organizer.id)
+                for i in range(7)
+            ]
+            db.session.add_all(events)
+            db.session.flush()
+            for event in events[::2]:
+                db.session.add(Registration(event_id=event.id, student_id=student.id))
+            db.session.commit()
+        
+        app.config["EVENTS_PAGE_SIZE"] = 3
+        try:
+            seen = []
+            url = "/student/events"
+            while url:
+                with assert_max_queries(3):
+                    page = login_student.get(url).get_data(as_text=True)
+                available, _, registered = page.partition("Your Registered Events")
+                seen += [f"Browse {i:02d}" for i in range(7) if f"Browse {i:02d}" in available]
+                assert "Browse 00" in registered and "Browse 02" in registered
+                marker = 'href="/student/events?cursor='
+                url = ("/student/events?cursor=" + available.split(marker, 1)[1].split('"', 1)[0]
+                       if marker in available else None)
+        finally:
+            app.config["EVENTS_PAGE_SIZE"] = 12
+        
+        assert seen == ["Browse 01", "Browse 03", "Browse 05"]
+        # Four upcoming registrations, three shown
+        assert "Browse 06" not in registered
+        assert "See all your registrations" in registered
+
+
+class TestEventHistory:
+    """Test the event history splits, orders and pages registrations in the database"""
+    
+    def test_past_events_are_paged_newest_first(self, login_student, app, assert_max_queries):
+        """Test past events come newest first a page at a time, with totals over all of them"""
+        with app.app_context():
+            organizer = User.query.filter_by(role="organizer").first()
+            student = User.query.filter_by(role="student").first()
+            past = [
+                Event(title=f"History {i:02d}", description="", event_date=datetime.utcnow() - timedelta(days=10 + i),
+                      location="Hall", capacity=10, created_by=organizer.id, is_paid=True, cost=2.5)
+                for i in range(5)
+            ]
+            upcoming = Event(title="History Next", description="", event_date=datetime.utcnow() + timedelta(days=3),
+                             location="Hall", capacity=10, created_by=organizer.id)
+            db.session.add_all(past + [upcoming])
+            db.session.flush()
+            for event in past + [upcoming]:
+                db.session.add(Registration(event_id=event.id, student_id=student.id))
+            db.session.commit()
+        
+        app.config["EVENTS_PAGE_SIZE"] = 2
+        try:
+            seen = []
+            url = "/student/event-history"
+            while url:
+                with assert_max_queries(4):
+                    page = login_student.get(url).get_data(as_text=True)
+                assert "History Next" in page
+                assert "Past Events (5)" in page
+                seen += sorted((page.index(f"History {i:02d}"), f"History {i:02d}")
+                               for i in range(5) if f"History {i:02d}" in page)
+                marker = 'href="/student/event-history?cursor='
+                url = ("/student/event-history?cursor=" + page.split(marker, 1)[1].split('"', 1)[0]
+                       if marker in page else None)
+        finally:
+            app.config["EVENTS_PAGE_SIZE"] = 12
+        
+        assert [title for _, title in seen] == [f"History {i:02d}" for i in range(5)]
+        assert "€12.50" in page
+
+
+class TestEventSearch:
+    """Test full-text event search and the index triggers behind it"""
+    
+    def search(self, client, **args):
+        response = client.get("/events/search.json", query_string=args)
+        assert response.status_code == 200
+        return [event["title"] for event in response.get_json()["events"]]
+    
+    def test_ranked_prefix_search_with_filters(self, client, app):
+        """Test prefix words match across columns, title hits rank first and filters apply"""
+        with app.app_context():
+            organizer = User.query.filter_by(role="organizer").first()
+            society = Society.query.first()
+            soon = datetime.utcnow() + timedelta(days=2)
+            db.session.add_all([
+                Event(title="Career Fair", description="Meet employers at the hackathon booth",
+                      event_date=soon, location="Main Hall", capacity=50, created_by=organizer.id),
+                Event(title="Hackathon Weekend", description="Build things", event_date=soon + timedelta(days=30),
+                      location="Café Lab", capacity=50, is_paid=True, cost=15.0,
+                      society_id=society.id, created_by=organizer.id),
+            ])
+            db.session.commit()
+        
+        assert self.search(client, q="hack") == ["Hackathon Weekend", "Career Fair"]
+        assert self.search(client, q="hack cafe") == ["Hackathon Weekend"]
+        assert self.search(client, q="tech hack") == ["Hackathon Weekend"]
+        assert self.search(client, q="hack", price="free") == ["Career Fair"]
+        assert self.search(client, q="hack", max_cost="10") == ["Career Fair"]
+        assert self.search(client, q="hack", to=(datetime.utcnow() + timedelta(days=5)).date().isoformat()) == ["Career Fair"]
+        with app.app_context():
+            society_id = Society.query.first().id
+        assert self.search(client, q="hack", society=society_id) == ["Hackathon Weekend"]
+        # Operators and stray quotes in input are searched literally, not parsed
+        assert self.search(client, q='hack" OR (') == []
+        assert self.search(client, q="***") != []
+    
+    def test_index_follows_writes(self, client, app):
+        """Test inserts, edits, society renames and deletes are reflected in results"""
+        with app.app_context():
+            event = Event.query.filter_by(title="Free Event").first()
+            event.title = "Poetry Night"
+            event.description = "Open mic"
+            db.session.commit()
+            event_id = event.id
+        assert self.search(client, q="poetry") == ["Poetry Night"]
+        assert self.search(client, q="free") == []
+        
+        with app.app_context():
+            Society.query.first().name = "Literature Society"
+            db.session.commit()
+        assert sorted(self.search(client, q="literature")) == ["Paid Event", "Poetry Night"]
+        
+        with app.app_context():
+            db.session.delete(db.session.get(Event, event_id))
+            db.session.commit()
+        assert self.search(client, q="poetry") == []
+    
+    def test_past_events_need_a_date_range(self, client, app):
+        """Test searches default to upcoming events unless dates are given"""
+        last_month = datetime.utcnow() - timedelta(days=30)
+        with app.app_context():
+            organizer = User.query.filter_by(role="organizer").first()
+            db.session.add(Event(title="Old Quiz", description="Trivia", event_date=last_month,
+                                 location="Bar", capacity=20, created_by=organizer.id))
+            db.session.commit()
+        
+        assert "Old Quiz" not in self.search(client)
+        assert self.search(client, q="quiz") == []
+        assert self.search(client, q="quiz", **{"from": (last_month - timedelta(days=1)).date().isoformat()}) == ["Old Quiz"]
+    
+    def test_candidate_cap_skips_past_events(self, client, app, monkeypatch):
+        """Test newer past matches don't push older upcoming ones out of the capped candidates"""
+        from backend import search
+        
+        with app.app_context():
+            organizer = User.query.filter_by(role="organizer").first()
+            db.session.add(Event(title="Zebra Talk", description="Upcoming", location="Zoo", capacity=20,
+                                 event_date=datetime.utcnow() + timedelta(days=3), created_by=organizer.id))
+            db.session.commit()
+            db.session.add(Event(title="Zebra Walk", description="Over", location="Zoo", capacity=20,
+                                 event_date=datetime.utcnow() - timedelta(days=3), created_by=organizer.id))
+            db.session.commit()
+        
+        monkeypatch.setattr(search, "SEARCH_CANDIDATES", 1)
+        assert self.search(client, q="zebra") == ["Zebra Talk"]
+    
+    def test_search_page_renders_results(self, client):
+        """Test the HTML page lists matches with the filter form"""
+        page = client.get("/events/search?q=paid").get_data(as_text=True)
+        assert "Paid Event" in page
+        assert "Free Event" not in page
+        assert 'name="society"' in page
+
+
+class TestJsonApi:
+    """Test the versioned JSON read API"""
+    
+    def test_event_list_fields_cursor_and_etag(self, client, app):
+        """Test field selection, cursor paging and 304s until a seat is taken"""
+        app.config["EVENTS_PAGE_SIZE"] = 1
+        try:
+            first = client.get("/api/v1/events?fields=id,title,available_slots")
+            second = client.get(first.get_json()["next_url"])
+        finally:
+            app.config["EVENTS_PAGE_SIZE"] = 12
+        
+        assert first.status_code == 200
+        page = first.get_json()
+        assert set(page["events"][0]) == {"id", "title", "available_slots"}
+        assert second.get_json()["next_cursor"] is None
+        titles = {page["events"][0]["title"], second.get_json()["events"][0]["title"]}
+        assert titles == {"Paid Event", "Free Event"}
+        
+        response = client.get("/api/v1/events")
+        etag = response.headers["ETag"]
+        assert etag.startswith('W/"')
+        cached = client.get("/api/v1/events", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.data == b""
+        
+        with app.app_context():
+            event = Event.query.filter_by(title="Free Event").first()
+            student = User.query.filter_by(role="student").first()
+            db.session.add(Registration(event_id=event.id, student_id=student.id))
+            db.session.commit()
+        
+        changed = client.get("/api/v1/events", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+    
+    def test_event_detail_and_errors(self, client, app):
+        """Test live seat counts on the detail view and JSON errors"""
+        with app.app_context():
+            event_id = Event.query.filter_by(title="Paid Event").first().id
+        
+        detail = client.get(f"/api/v1/events/{event_id}").get_json()["event"]
+        assert detail["capacity"] == 5 and detail["available_slots"] == 5 and detail["is_full"] is False
+        
+        missing = client.get("/api/v1/events/99999")
+        assert missing.status_code == 404
+        assert missing.get_json()["error"] == "Event not found"
+        assert client.get("/api/v1/events?fields=title,secret").status_code == 400
+        assert client.get("/api/v1/events?cursor=garbage").status_code == 400
+    
+    def test_crafted_cursors_are_rejected(self, client):
+        """Test well-formed base64 cursors holding non-scalar values are refused, not a 500"""
+        for payload in (b"[[1],[2]]", b"[null,null]", b'[{"dt":"yesterday"},1]', b'[{"x":1},1]'):
+            cursor = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+            assert client.get(f"/api/v1/events?cursor={cursor}").status_code == 400
+            assert client.get(f"/events.json?cursor={cursor}").status_code == 400
+            assert client.get(f"/?cursor={cursor}").status_code == 200
+        assert client.get("/api/v1/me/registrations").status_code == 401
+    
+    def test_my_registrations(self, login_student, app):
+        """Test a student sees only their own registrations with nested events"""
+        with app.app_context():
+            event = Event.query.filter_by(title="Paid Event").first()
+            student = User.query.filter_by(role="student").first()
+            db.session.add(Registration(event_id=event.id, student_id=student.id, payment_method="onsite"))
+            db.session.commit()
+        
+        response = login_student.get("/api/v1/me/registrations?fields=payment_method&event_fields=title")
+        assert response.status_code == 200
+        assert response.get_json()["registrations"] == [{"payment_method": "onsite", "event": {"title": "Paid Event"}}]
+        assert "private" in response.headers["Cache-Control"]
+        
+        again = login_student.get("/api/v1/me/registrations?fields=payment_method&event_fields=title",
+                                  headers={"If-None-Match": response.headers["ETag"]})
+        assert again.status_code == 304
+
+
+class TestLiveSeats:
+    """Test seat counts are published on commit and streamed over SSE"""
+    
+    def test_commits_publish_seat_counts(self, app):
+        """Test registrations, bulk registrations and capacity edits publish; rollbacks don't"""
+        from backend.imports import bulk_register
+        
+        publisher = app.extensions["seat_publisher"]
+        with app.app_context():
+            event = Event.query.filter_by(title="Free Event").first()
+            student = User.query.filter_by(role="student").first()
+            
+            start = publisher.position
+            db.session.add(Registration(event_id=event.id, student_id=student.id))
+            db.session.flush()
+            db.session.rollback()
+            assert publisher.position == start
+            
+            db.session.add(Registration(event_id=event.id, student_id=student.id))
+            db.session.commit()
+            position, payloads = publisher.wait(start, timeout=0)
+            assert payloads == [{"id": event.id, "registered": 1, "capacity": 5, "available": 4}]
+            
+            other = User(student_number="S0002", name="Other", email="other@dbs.ie", role="student")
+            other.set_password("other123")
+            db.session.add(other)
+            db.session.commit()
+            assert publisher.position == position
+            bulk_register(event.id, ["S0002"])
+            position, payloads = publisher.wait(position, timeout=0)
+            assert payloads[0]["registered"] == 2
+            
+            event.capacity = 10
+            db.session.commit()
+            assert publisher.wait(position, timeout=0)[1][0]["available"] == 8
+    
+    def test_register_links_are_tagged_for_live_updates(self, login_student, app):
+        """Test register links carry their event id so the page can disable them when full"""
+        with app.app_context():
+            event_id = Event.query.filter_by(title="Free Event").first().id
+        for url in ("/events/search", "/student/events"):
+            assert f'data-seat-register="{event_id}"' in login_student.get(url).get_data(as_text=True)
+    
+    def test_stream_sends_subscribed_events(self, client, app):
+        """Test the SSE stream replays latest counts for its events and resumes by Last-Event-ID"""
+        publisher = app.extensions["seat_publisher"]
+        with app.app_context():
+            free_id = Event.query.filter_by(title="Free Event").first().id
+            paid_id = Event.query.filter_by(title="Paid Event").first().id
+        publisher.publish([(free_id, 3, 5), (paid_id, 1, 5)])
+        
+        app.config.update(SEAT_STREAM_MAX_SECONDS=0.3, SEAT_STREAM_HEARTBEAT=0.1)
+        try:
+            response = client.get(f"/live/seats?events={free_id}")
+            body = response.get_data(as_text=True)
+            resumed = client.get(f"/live/seats?events={free_id}",
+                                 headers={"Last-Event-ID": str(publisher.position)}).get_data(as_text=True)
+        finally:
+            app.config.update(SEAT_STREAM_MAX_SECONDS=300, SEAT_STREAM_HEARTBEAT=15)
+        
+        assert response.mimetype == "text/event-stream"
+        assert f'event: seats\ndata: {{"id": {free_id}, "registered": 3, "capacity": 5, "available": 2}}' in body
+        assert f'"id": {paid_id}' not in body
+        assert f"id: {publisher.position}\n" in body
+        assert "event: seats" not in resumed
+        assert ": keepalive" in resumed
+
+
+class TestDatabaseProfiles:
+    """Test database URL handling for the connection profiles"""
+    
+    def test_in_memory_sqlite_skips_pool_sizing(self):
+        """Test the tuned profile works with an in-memory database"""
+        from flask import Flask
+        from flask_sqlalchemy import SQLAlchemy
+        from backend.database import init_database
+        
+        app = Flask(__name__)
+        app.config.update(SQLALCHEMY_DATABASE_URI="sqlite://", DATABASE_PROFILE="tuned")
+        memory_db = SQLAlchemy()
+        init_database(app, memory_db)
+        assert "pool_size" not in app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+        with app.app_context():
+            assert memory_db.session.execute(memory_db.text("SELECT 1")).scalar() == 1
+    
+    def test_non_sqlite_url_is_rejected(self):
+        """Test a server database URL fails fast with a clear error"""
+        from flask import Flask
+        from backend.database import configure_database
+        
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "postgresql://localhost/events"
+        with pytest.raises(ValueError, match="only SQLite"):
+            configure_database(app)
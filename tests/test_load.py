@@ -0,0 +1,147 @@
+"""
+Load Tests for DBS Event Management System
+Fires concurrent requests at shared resources and checks invariants hold
+"""
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from models import db, User, Event, Registration
+
+
+class TestConcurrentRegistration:
+    """Test seat claiming under concurrent register_event requests"""
+
+    STUDENTS = 40
+    CAPACITY = 10
+
+    def test_exactly_capacity_registrations_succeed(self, app):
+        """Test N simultaneous registrations for C seats grant exactly C"""
+        with app.app_context():
+            organizer = User.query.filter_by(role="organizer").first()
+            event = Event(
+                title="Launch Event",
+                event_date=datetime.utcnow() + timedelta(days=3),
+                location="Main Hall",
+                capacity=self.CAPACITY,
+                is_paid=False,
+                cost=0.0,
+                created_by=organizer.id,
+            )
+            db.session.add(event)
+
+            # Cheap hashes keep setup fast; sessions are injected below
+            password_hash = generate_password_hash("load", method="pbkdf2:sha256:1")
+            students = [
+                User(
+                    student_number=f"L{i:04d}",
+                    name=f"Load Student {i}",
+                    email=f"load{i}@test.ie",
+                    password_hash=password_hash,
+                    role="student",
+                )
+                for i in range(self.STUDENTS)
+            ]
+            db.session.add_all(students)
+            db.session.commit()
+            event_id = event.id
+            student_ids = [s.id for s in students]
+
+        clients = []
+        for student_id in student_ids:
+            client = app.test_client()
+            with client.session_transaction() as sess:
+                sess["_user_id"] = str(student_id)
+                sess["_fresh"] = True
+            clients.append(client)
+
+        barrier = threading.Barrier(len(clients))
+        outcomes = []
+        lock = threading.Lock()
+
+        def register(client):
+            barrier.wait()
+            resp = client.post(f"/event/{event_id}/register", data={
+                "phone_number": "0871234567",
+                "payment_method": ""
+            }, follow_redirects=False)
+            with lock:
+                outcomes.append(resp.headers.get("Location", ""))
+
+        threads = [threading.Thread(target=register, args=(c,)) for c in clients]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        granted = [loc for loc in outcomes if loc.endswith("/student/dashboard")]
+        rejected = [loc for loc in outcomes if loc.endswith("/")]
+        print(f"\n{len(outcomes)} concurrent registrations for {self.CAPACITY} seats "
+              f"in {elapsed:.2f}s ({len(outcomes) / elapsed:.0f} req/s)")
+
+        assert len(outcomes) == self.STUDENTS
+        assert len(granted) == self.CAPACITY
+        assert len(rejected) == self.STUDENTS - self.CAPACITY
+
+        with app.app_context():
+            event = db.session.get(Event, event_id)
+            assert event.registered_count == self.CAPACITY
+            assert Registration.query.filter_by(event_id=event_id).count() == self.CAPACITY
+
+
+class TestLoginStorm:
+    """Test slow password hashing doesn't starve other requests"""
+
+    LOGIN_THREADS = 8
+    SAMPLES = 20
+
+    def _index_latencies(self, client):
+        latencies = []
+        for _ in range(self.SAMPLES):
+            started = time.perf_counter()
+            resp = client.get("/")
+            latencies.append(time.perf_counter() - started)
+            assert resp.status_code == 200
+        return latencies
+
+    def test_index_stays_fast_during_login_storm(self, app):
+        """Test the event listing keeps its latency while logins hash on the worker pool"""
+        browser = app.test_client()
+        baseline = statistics.median(self._index_latencies(browser))
+
+        stop = threading.Event()
+        statuses = []
+        lock = threading.Lock()
+
+        def login_loop():
+            client = app.test_client()
+            while not stop.is_set():
+                resp = client.post("/login", data={
+                    "email": "student@dbs.ie",
+                    "password": "student123"
+                })
+                with lock:
+                    statuses.append(resp.status_code)
+                client.get("/logout")
+
+        threads = [threading.Thread(target=login_loop) for _ in range(self.LOGIN_THREADS)]
+        for thread in threads:
+            thread.start()
+        try:
+            time.sleep(0.2)  # let the hashing queue fill up
+            storm = statistics.median(self._index_latencies(browser))
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        print(f"\nindex median {baseline * 1000:.1f}ms idle, {storm * 1000:.1f}ms during "
+              f"{len(statuses)} logins from {self.LOGIN_THREADS} threads")
+
+        assert statuses and all(status == 302 for status in statuses)
+        assert storm < max(baseline * 5, 0.02)
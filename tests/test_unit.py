@@ -116,6 +116,29 @@ class TestEventModel:
             assert event.get_registered_count() == 2
             assert event.available_slots() == 0
             assert event.is_full() is True
+    
+    def test_registered_count_tracks_deletes_and_reconciles(self, app):
+        """Test stored registration count follows deletes and can be repaired"""
+        with app.app_context():
+            event = Event.query.filter_by(is_paid=False).first()
+            student = User.query.filter_by(role="student").first()
+            registration = Registration(event_id=event.id, student_id=student.id, phone_number="0871234567")
+            db.session.add(registration)
+            db.session.commit()
+            assert event.registered_count == 1
+            
+            db.session.delete(registration)
+            db.session.commit()
+            assert event.registered_count == 0
+            
+            # Simulate drift and repair it from the registration table
+            event.registered_count = 4
+            db.session.commit()
+            assert Event.reconcile_registered_counts() == 1
+            db.session.commit()
+            db.session.refresh(event)
+            assert event.registered_count == 0
+            assert Event.reconcile_registered_counts() == 0
 
 
 class TestRegistrationModel:
@@ -213,3 +236,369 @@ class TestBasicRoutes:
         """Test admin can access their dashboard"""
         resp = login_admin.get("/admin/dashboard")
         assert resp.status_code == 200
+
+
+class TestSchemaMigrations:
+    """Test versioned schema upgrades"""
+    
+    def test_upgrade_is_idempotent_and_indexes_hot_columns(self, app):
+        """Test migrations run cleanly over a create_all schema and only once"""
+        from sqlalchemy import inspect
+        from backend.migrations import HOT_COLUMN_INDEXES, MIGRATIONS, upgrade_schema
+        
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+            with db.engine.begin() as connection:
+                connection.exec_driver_sql("PRAGMA user_version = 0")
+            
+            assert len(upgrade_schema()) == len(MIGRATIONS)
+            assert upgrade_schema() == []
+            
+            inspector = inspect(db.engine)
+            existing = {
+                index["name"]
+                for table in ("user", "society", "event", "registration")
+                for index in inspector.get_indexes(table)
+            }
+            assert {name for name, _, _ in HOT_COLUMN_INDEXES} <= existing
+    
+    def test_upgrade_db_command(self, app):
+        """Test `flask upgrade-db` applies outstanding migrations for non-app.py deployments"""
+        from backend.migrations import MIGRATIONS, pending_migrations
+        
+        with app.app_context():
+            db.session.remove()
+            with db.engine.begin() as connection:
+                connection.exec_driver_sql("PRAGMA user_version = 3")
+            assert len(pending_migrations()) == len(MIGRATIONS) - 3
+        
+        result = app.test_cli_runner().invoke(args=["upgrade-db"])
+        assert result.exit_code == 0
+        assert "Applied migration: event.updated_at" in result.output
+        with app.app_context():
+            assert pending_migrations() == []
+
+
+class TestDashboardStats:
+    """Test cached admin dashboard statistics"""
+    
+    def test_figures_cache_and_invalidation(self, app, assert_max_queries):
+        """Test aggregate figures, cache hits and invalidation on registration"""
+        from backend.stats import dashboard_stats
+        
+        with app.test_request_context():
+            stats = dashboard_stats()
+            assert stats.total_users == 3
+            assert stats.total_societies == 1
+            assert stats.total_events == 2
+            assert stats.total_registrations == 0
+            assert stats.total_capacity == 10
+            assert stats.paid_revenue == 0
+            assert len(stats.registrations_per_day) == 14
+            
+            with assert_max_queries(0):
+                assert dashboard_stats() is stats
+            
+            paid_event = Event.query.filter_by(is_paid=True).first()
+            student = User.query.filter_by(role="student").first()
+            db.session.add(Registration(event_id=paid_event.id, student_id=student.id, payment_method="online"))
+            db.session.commit()
+            
+            stats = dashboard_stats()
+            assert stats.total_registrations == 1
+            assert stats.paid_revenue == 10.0
+            assert stats.fill_rate == 0.1
+            assert stats.registrations_per_day[-1][1] == 1
+    
+    def test_invalidated_only_by_committed_relevant_changes(self, app):
+        """Test rolled-back writes and unrelated user edits keep the cached figures"""
+        from backend.stats import dashboard_stats
+        
+        with app.test_request_context():
+            stats = dashboard_stats()
+            
+            student = User.query.filter_by(role="student").first()
+            student.set_password("rehashed")
+            db.session.commit()
+            assert dashboard_stats() is stats
+            
+            db.session.add(Society(name="Uncommitted", description="", society_head_id=student.id))
+            db.session.flush()
+            assert dashboard_stats() is stats
+            db.session.rollback()
+            assert dashboard_stats() is stats
+            
+            event = Event.query.first()
+            event.capacity += 1
+            db.session.commit()
+            assert dashboard_stats() is not stats
+
+
+class TestIdentityCache:
+    """Test the Flask-Login identity snapshot cache"""
+    
+    def test_identity_cached_and_invalidated_on_edit(self, app, login_admin, assert_max_queries):
+        """Test snapshots are served from cache until an admin edits the user"""
+        from backend.identity import UserIdentity, load_identity
+        
+        with app.test_request_context():
+            student = User.query.filter_by(role="student").first()
+            identity = load_identity(student.id)
+            assert isinstance(identity, UserIdentity)
+            assert (identity.name, identity.role) == ("Student", "student")
+            with pytest.raises(AttributeError):
+                identity.role = "superadmin"
+            
+            with assert_max_queries(0):
+                assert load_identity(str(student.id)) is identity
+            
+            # Attributes outside the snapshot fall through to the ORM user
+            assert identity.registrations == []
+            student_id = student.id
+        
+        resp = login_admin.post(f"/admin/edit-student/{student_id}", data={
+            "student_number": "S0001",
+            "name": "Renamed Student",
+            "email": "student@dbs.ie",
+            "password": ""
+        })
+        assert resp.status_code in (301, 302)
+        
+        with app.test_request_context():
+            assert load_identity(student_id).name == "Renamed Student"
+    
+    def test_demotion_refused_on_next_request(self, app, login_organizer):
+        """Test a request between flush and commit can't re-cache the old role"""
+        assert login_organizer.get("/organizer/dashboard").status_code == 200
+        
+        with app.app_context():
+            organizer = User.query.filter_by(email="organizer@dbs.ie").first()
+            organizer.role = "student"
+            db.session.flush()
+            # Another request runs before the demotion commits and sees the old row
+            assert login_organizer.get("/organizer/dashboard").status_code == 200
+            db.session.commit()
+        
+        resp = login_organizer.get("/organizer/dashboard")
+        assert resp.status_code in (301, 302)
+
+
+class TestPasswordHashPolicy:
+    """Test configurable hash cost and transparent rehash on login"""
+    
+    def test_login_rehashes_outdated_hash(self, client, app):
+        """Test successful login upgrades a hash made with other parameters"""
+        from werkzeug.security import generate_password_hash
+        
+        with app.app_context():
+            user = User(student_number="S3131", name="Legacy", email="legacy@test.ie", role="student",
+                        password_hash=generate_password_hash("legacy123", method="pbkdf2:sha256:1000"))
+            db.session.add(user)
+            db.session.commit()
+            assert user.needs_rehash() is True
+        
+        # A failed login must not touch the hash
+        client.post("/login", data={"email": "legacy@test.ie", "password": "wrong"})
+        with app.app_context():
+            assert User.query.filter_by(email="legacy@test.ie").first().password_hash.startswith("pbkdf2:sha256:1000$")
+        
+        resp = client.post("/login", data={"email": "legacy@test.ie", "password": "legacy123"})
+        assert resp.status_code in (301, 302)
+        with app.app_context():
+            user = User.query.filter_by(email="legacy@test.ie").first()
+            assert user.password_hash.startswith(app.config["PASSWORD_HASH_METHOD"] + "$")
+            assert user.needs_rehash() is False
+            assert user.check_password("legacy123") is True
+    
+    def test_configured_method_is_used(self, app):
+        """Test set_password honours PASSWORD_HASH_METHOD"""
+        from models import normalize_hash_method
+        
+        assert normalize_hash_method("pbkdf2") == "pbkdf2:sha256:600000"
+        assert normalize_hash_method("scrypt") == "scrypt:32768:8:1"
+        assert normalize_hash_method("scrypt:16384") == "scrypt:16384:8:1"
+        assert normalize_hash_method("scrypt:16384:4") == "scrypt:16384:4:1"
+        with pytest.raises(ValueError):
+            normalize_hash_method("scrypt:lots")
+        with pytest.raises(ValueError):
+            normalize_hash_method("md5")
+        
+        original = app.config["PASSWORD_HASH_METHOD"]
+        app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:2000"
+        try:
+            with app.app_context():
+                user = User(name="Cheap", email="cheap@test.ie", role="student")
+                user.set_password("secret")
+                assert user.password_hash.startswith("pbkdf2:sha256:2000$")
+            
+            # A partial spec matches the full parameters werkzeug stores
+            app.config["PASSWORD_HASH_METHOD"] = "scrypt:16384"
+            with app.app_context():
+                user.set_password("secret")
+                assert user.password_hash.startswith("scrypt:16384:8:1$")
+                assert user.needs_rehash() is False
+        finally:
+            app.config["PASSWORD_HASH_METHOD"] = original
+
+
+class TestPasswordHasher:
+    """Test the worker-pool password hasher"""
+    
+    def test_hash_many_chunks_release_their_slots(self):
+        """Test batches are hashed in order and leave every queue slot free"""
+        from werkzeug.security import check_password_hash
+        from backend.hashing import PasswordHasher
+        
+        hasher = PasswordHasher(workers=2, max_pending=2, queue_timeout=30)
+        try:
+            passwords = [f"secret{i}" for i in range(20)]
+            hashes = hasher.hash_many(passwords, "pbkdf2:sha256:1000")
+            assert len(hashes) == 20
+            assert all(check_password_hash(h, p) for h, p in zip(hashes, passwords))
+            # Both slots are free again, so a single call doesn't wait
+            for _ in range(2):
+                assert hasher._slots.acquire(timeout=5)
+            for _ in range(2):
+                hasher._slots.release()
+            assert hasher.verify(hashes[0], "secret0") is True
+        finally:
+            hasher.shutdown()
+
+
+class TestFragmentCache:
+    """Test cached event card fragments and their invalidation"""
+    
+    def test_cards_reused_until_event_changes(self, app, client):
+        """Test hits on repeat renders and misses after edit, registration or society rename"""
+        cache = app.extensions["fragment_cache"]
+        client.get("/")
+        misses = cache.misses
+        assert misses > 0
+        client.get("/")
+        assert cache.misses == misses
+        assert cache.hits >= misses
+        
+        with app.app_context():
+            event = Event.query.filter_by(title="Free Event").first()
+            event.title = "Renamed Event"
+            db.session.commit()
+        assert "Renamed Event" in client.get("/").get_data(as_text=True)
+        assert cache.misses == misses + 1
+        
+        with app.app_context():
+            event = Event.query.filter_by(title="Renamed Event").first()
+            student = User.query.filter_by(role="student").first()
+            db.session.add(Registration(event_id=event.id, student_id=student.id))
+            db.session.commit()
+        page = client.get("/").get_data(as_text=True)
+        assert "1/5" in page
+        assert cache.misses == misses + 2
+        
+        with app.app_context():
+            Society.query.first().name = "Renamed Society"
+            db.session.commit()
+        assert "Renamed Society" in client.get("/").get_data(as_text=True)
+    
+    def test_per_user_parts_stay_live(self, app):
+        """Test students share cached cards but each sees their own registrations"""
+        with app.app_context():
+            event = Event.query.filter_by(title="Free Event").first()
+            student = User.query.filter_by(role="student").first()
+            db.session.add(Registration(event_id=event.id, student_id=student.id))
+            other = User(student_number="S0002", name="Other", email="other@dbs.ie", role="student")
+            other.set_password("other123")
+            db.session.add(other)
+            db.session.commit()
+        
+        pages = {}
+        for email, password in (("student@dbs.ie", "student123"), ("other@dbs.ie", "other123")):
+            client = app.test_client()
+            client.post("/login", data={"email": email, "password": password})
+            page = client.get("/student/events").get_data(as_text=True)
+            available, _, registered = page.partition("Your Registered Events")
+            pages[email] = ("Free Event" in available, "Free Event" in registered)
+        
+        assert pages["student@dbs.ie"] == (False, True)
+        assert pages["other@dbs.ie"] == (True, False)
+        assert app.extensions["fragment_cache"].hits > 0
+    
+    def test_stored_fragments_dropped_on_new_version(self, app, client):
+        """Test a different cache version (a deploy) misses entries a shared store kept"""
+        from backend.fragments import FragmentCache
+        
+        cache = app.extensions["fragment_cache"]
+        client.get("/")
+        redeployed = FragmentCache(cache.backend, version="2")
+        app.extensions["fragment_cache"] = redeployed
+        try:
+            client.get("/")
+        finally:
+            app.extensions["fragment_cache"] = cache
+        assert redeployed.misses > 0 and redeployed.hits == 0
+    
+    def test_sqlite_backend_shared_between_instances(self, tmp_path):
+        """Test two processes' worth of backends see each other's entries"""
+        from backend.fragments import SQLiteFragmentBackend
+        
+        path = str(tmp_path / "fragments.db")
+        writer = SQLiteFragmentBackend(path, maxsize=2)
+        reader = SQLiteFragmentBackend(path, maxsize=2)
+        writer.set("card:1", "v1", "<p>one</p>")
+        assert reader.get("card:1") == ("v1", "<p>one</p>")
+        writer.set("card:1", "v2", "<p>two</p>")
+        assert reader.get("card:1") == ("v2", "<p>two</p>")
+        
+        writer.PRUNE_EVERY = 1
+        for i in range(2, 6):
+            writer.set(f"card:{i}", "v1", "x")
+        assert reader.get("card:1") is None
+        assert reader.get("card:5") == ("v1", "x")
+
+
+class TestSeatPublisher:
+    """Test the in-process seat count broadcaster"""
+    
+    def test_listeners_get_newest_count_per_event(self):
+        """Test listeners see changes past their position, filtered and de-duplicated"""
+        from backend.live import SeatPublisher
+        
+        publisher = SeatPublisher(backlog=2)
+        publisher.publish([(1, 1, 5), (2, 4, 4)])
+        publisher.publish([(1, 2, 5)])
+        
+        position, payloads = publisher.wait(1, timeout=0)
+        assert position == 3
+        assert sorted(p["id"] for p in payloads) == [1, 2]
+        assert publisher.wait(0, event_ids={1}, timeout=0)[1] == [
+            {"id": 1, "registered": 2, "capacity": 5, "available": 3}
+        ]
+        assert publisher.wait(3, timeout=0) == (3, [])
+        
+        # Falling behind the trimmed buffer returns the latest of every event
+        for count in range(3, 6):
+            publisher.publish([(1, count, 5)])
+        assert {p["id"]: p["available"] for p in publisher.wait(0, timeout=0)[1]} == {1: 0, 2: 0}
+    
+    def test_unrelated_messages_do_not_end_the_wait(self):
+        """Test a filtered listener keeps waiting through other events' changes"""
+        import threading
+        import time
+        from backend.live import SeatPublisher
+        
+        publisher = SeatPublisher()
+        results = []
+        listener = threading.Thread(target=lambda: results.append(publisher.wait(0, event_ids={7}, timeout=5)))
+        listener.start()
+        time.sleep(0.05)
+        publisher.publish([(1, 1, 5)])
+        publisher.publish([(2, 1, 5)])
+        time.sleep(0.05)
+        assert results == []
+        publisher.publish([(7, 3, 5)])
+        listener.join(5)
+        assert results == [(3, [{"id": 7, "registered": 3, "capacity": 5, "available": 2}])]
+        
+        # Only other events changed before the timeout: empty, positioned past them
+        publisher.publish([(1, 2, 5)])
+        assert publisher.wait(3, event_ids={7}, timeout=0.05) == (4, [])